@@ -0,0 +1,277 @@
+"""
+Smart Desk Monitor - Batch Analysis
+Post-hoc scoring of stored footage: frames are decoded on a background
+thread, detected in batches, and statistics are computed in one vectorized
+pass over the resulting per-frame signals
+
+    python batch_analysis.py session.rec
+    python batch_analysis.py footage.mp4 --save-signals footage.npz
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from capture import open_source
+from config import ConfigWatcher, ConfigError, add_config_arguments
+from detection_cache import cache_from_config
+from preprocess import configure_opencv, describe_opencv, eye_region
+from session_analytics import SessionSignals, simple_statistics
+from session_recording import RecordingSource
+
+
+def open_offline_source(path):
+    """Open a session recording, video file or image directory"""
+    if os.path.isdir(path):
+        return open_source(path)
+    try:
+        return RecordingSource(path)
+    except ValueError:
+        return open_source(path)
+
+
+class FrameDecoder(threading.Thread):
+    """Decode frames on a background thread and queue them in batches
+
+    Frames are mirrored like the live monitors do before detecting, so
+    detections, face positions and cache keys match a live session.
+    """
+    def __init__(self, source, batch_size, queue_depth=4):
+        super().__init__(daemon=True)
+        self.source = source
+        self.batch_size = batch_size
+        self.batches = queue.Queue(maxsize=queue_depth)
+        self.decode_time = 0.0
+
+    def run(self):
+        frames, timestamps = [], []
+        try:
+            while True:
+                start = time.perf_counter()
+                ret, frame = self.source.read()
+                self.decode_time += time.perf_counter() - start
+                if not ret:
+                    break
+                # flip() writes a new array, so buffer-reusing sources are safe to queue
+                frames.append(cv2.flip(frame, 1))
+                timestamps.append(self.source.last_timestamp)
+                if len(frames) == self.batch_size:
+                    self.batches.put((frames, timestamps))
+                    frames, timestamps = [], []
+            if frames:
+                self.batches.put((frames, timestamps))
+            self.batches.put(None)
+        except Exception as e:  # Hand decoder failures to the consumer
+            self.batches.put(e)
+
+    def __iter__(self):
+        while True:
+            item = self.batches.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+class HaarBatchDetector:
+    """Haar cascade detection of the largest face and its eyes, spread over a thread pool
+
+    OpenCV releases the GIL inside detectMultiScale, so threads scale with
+    cores. Cascades aren't safe to share, so each thread loads its own.
+    With [cache] enabled, all threads share one detection cache so
+    repeated or overlapping footage is only detected once.
+    """
+    def __init__(self, config, workers):
+        self.detection = config.detection
+        self.scale = config.performance.detection_scale
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.local = threading.local()
+        self.cache = cache_from_config(config.cache)
+
+    def _cascades(self):
+        if not hasattr(self.local, 'face'):
+            self.local.face = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+            self.local.eye = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
+        return self.local.face, self.local.eye
+
+    def _count_eyes(self, gray, face):
+        roi, _ = eye_region(gray, face, self.scale)
+        eyes = self._cascades()[1].detectMultiScale(
+            roi, self.detection.eye_scale_factor, self.detection.eye_min_neighbors)
+        return len(eyes)
+
+    def _detect_frame(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.cache is not None:
+            key = self.cache.key(gray)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+            result = self._detect_gray(gray)
+            self.cache.put(key, result)
+            return result
+        return self._detect_gray(gray)
+
+    def _detect_gray(self, gray):
+        small = gray
+        if self.scale < 1.0:
+            small = cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        faces = self._cascades()[0].detectMultiScale(
+            small, self.detection.face_scale_factor, self.detection.face_min_neighbors)
+        if len(faces) == 0:
+            return None, 0
+        face = (max(faces, key=lambda f: f[2] * f[3]) / self.scale).astype(int)
+        return face, self._count_eyes(gray, face)
+
+    def detect(self, frames):
+        """Return [(face rect or None, eye count), ...] for a batch of BGR frames"""
+        return list(self.pool.map(self._detect_frame, frames))
+
+    def close(self):
+        self.pool.shutdown()
+
+
+class DnnBatchDetector(HaarBatchDetector):
+    """res10 SSD face detector run over a whole batch as one N-frame blob; eyes still use Haar"""
+    INPUT_SIZE = (300, 300)
+    MEAN = (104.0, 177.0, 123.0)
+
+    def __init__(self, config, workers):
+        super().__init__(config, workers)
+        self.net = cv2.dnn.readNetFromCaffe(config.detection.dnn_config, config.detection.dnn_model)
+        self.confidence = config.detection.dnn_confidence
+
+    def _faces_from_output(self, output, frames):
+        """Pick the largest confident face per image from the SSD detections"""
+        faces = [None] * len(frames)
+        areas = [0] * len(frames)
+        for image_id, _, confidence, x1, y1, x2, y2 in output.reshape(-1, 7):
+            if confidence < self.confidence:
+                continue
+            i = int(image_id)
+            h, w = frames[i].shape[:2]
+            x1, y1 = max(int(x1 * w), 0), max(int(y1 * h), 0)
+            x2, y2 = min(int(x2 * w), w), min(int(y2 * h), h)
+            area = (x2 - x1) * (y2 - y1)
+            if x2 > x1 and y2 > y1 and area > areas[i]:
+                faces[i] = np.array([x1, y1, x2 - x1, y2 - y1])
+                areas[i] = area
+        return faces
+
+    def _eyes_for(self, item):
+        frame, face = item
+        if face is None:
+            return None, 0
+        return face, self._count_eyes(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), face)
+
+    def _detect_batch(self, frames):
+        blob = cv2.dnn.blobFromImages(frames, 1.0, self.INPUT_SIZE, self.MEAN, swapRB=False, crop=False)
+        self.net.setInput(blob)
+        faces = self._faces_from_output(self.net.forward(), frames)
+        return list(self.pool.map(self._eyes_for, zip(frames, faces)))
+
+    def detect(self, frames):
+        if self.cache is None:
+            return self._detect_batch(frames)
+
+        # Only frames the cache can't answer go into the blob
+        keys = [self.cache.key(frame) for frame in frames]
+        results = [self.cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            for i, result in zip(missing, self._detect_batch([frames[i] for i in missing])):
+                results[i] = result
+                self.cache.put(keys[i], result)
+        return results
+
+
+class BatchAnalyzer:
+    """Turn stored footage into per-frame signals, batch by batch"""
+    def __init__(self, config, batch_size=None, workers=None):
+        self.config = config
+        self.batch_size = batch_size or config.performance.batch_size
+        self.workers = workers or config.performance.batch_workers or os.cpu_count() or 1
+        # Haar workers each run OpenCV concurrently, so they split the cores between them;
+        # the DNN forward pass runs on one thread and gets OpenCV's whole pool
+        if config.detection.dnn_model and config.detection.dnn_config:
+            self.detector = DnnBatchDetector(config, self.workers)
+            configure_opencv(config.performance)
+        else:
+            self.detector = HaarBatchDetector(config, self.workers)
+            configure_opencv(config.performance, self.workers)
+        self.elapsed = 0.0
+
+    def analyze(self, source):
+        """Return SessionSignals for every frame the source yields"""
+        timestamps, detected, sizes, centers, eyes = [], [], [], [], []
+        decoder = FrameDecoder(source, self.batch_size)
+        start = time.perf_counter()
+        decoder.start()
+
+        for frames, batch_times in decoder:
+            for frame, (face, eye_count) in zip(frames, self.detector.detect(frames)):
+                if face is None:
+                    detected.append(False)
+                    sizes.append(0)
+                    centers.append(np.nan)
+                else:
+                    x, y, w, h = face
+                    detected.append(True)
+                    sizes.append(int(w * h))
+                    centers.append((x + w // 2) / frame.shape[1])
+                eyes.append(eye_count)
+            timestamps.extend(batch_times)
+
+        self.elapsed = time.perf_counter() - start
+        return SessionSignals(timestamps, detected, sizes, centers, eyes, session_start=source.start_time)
+
+    def close(self):
+        self.detector.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score recorded sessions offline in batches")
+    parser.add_argument('path', help="Session recording (.rec), video file or image directory")
+    parser.add_argument('--batch-size', type=int, default=None, help="Frames per detection batch")
+    parser.add_argument('--workers', type=int, default=None, help="Detection threads (default: one per core)")
+    parser.add_argument('--save-signals', metavar='NPZ', help="Store the per-frame signals for later re-analysis")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        config = ConfigWatcher(args.config, args.overrides).config
+    except ConfigError as e:
+        parser.error(str(e))
+
+    source = open_offline_source(args.path)
+    analyzer = BatchAnalyzer(config, args.batch_size, args.workers)
+    print(f"🎞️  {source.describe()} - {type(analyzer.detector).__name__}, "
+          f"batches of {analyzer.batch_size}, {analyzer.workers} workers", file=sys.stderr)
+    print(f"⚙️  {describe_opencv()}", file=sys.stderr)
+    try:
+        signals = analyzer.analyze(source)
+    finally:
+        analyzer.close()
+        source.release()
+
+    stats = simple_statistics(signals, config)
+    if args.save_signals:
+        signals.save(args.save_signals)
+
+    footage = stats['duration']
+    speed = footage / analyzer.elapsed if analyzer.elapsed > 0 else 0.0
+    print(f"⚡ {len(signals)} frames in {analyzer.elapsed:.1f}s "
+          f"({len(signals) / max(analyzer.elapsed, 1e-9):.0f} FPS, {speed:.1f}x real-time, "
+          f"{speed / analyzer.workers:.1f}x per worker)", file=sys.stderr)
+    if analyzer.detector.cache is not None:
+        print(f"🗃️  Detection cache: {analyzer.detector.cache.summary()}", file=sys.stderr)
+    print(json.dumps(stats, indent=2))
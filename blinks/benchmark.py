@@ -0,0 +1,140 @@
+"""
+Smart Desk Monitor - Benchmark
+Time the monitor pipeline on synthetic frames under different OpenCV
+thread counts, SIMD and OpenCL settings, and print the best setting for
+this machine. With --monitors N each monitor runs in its own process, as
+separate monitors on one host do
+
+    python benchmark.py
+    python benchmark.py --monitors 3 --seconds 10 --size 640x480
+"""
+
+import argparse
+import itertools
+import multiprocessing
+import os
+import time
+
+import cv2
+
+from capture import SyntheticSource
+from config import build_config, parse_overrides
+from preprocess import Preprocessor, configure_opencv, opencl_available
+from memory_guard import BufferPool
+from session_recording import FrameClock
+
+
+def thread_candidates(monitors):
+    cores = os.cpu_count() or 1
+    counts = {1, max(1, cores // monitors), cores}
+    n = 2
+    while n < cores:
+        counts.add(n)
+        n *= 2
+    return sorted(counts)
+
+
+def build_monitor(full, clock, config):
+    if full:
+        from smart_desk_monitor import SmartDeskMonitor
+        monitor = SmartDeskMonitor(clock=clock, config=config)
+    else:
+        from smart_desk_monitor_simple import SimplifiedDeskMonitor
+        monitor = SimplifiedDeskMonitor(clock=clock, config=config)
+    monitor.sound_enabled = False
+    return monitor
+
+
+def time_preprocessing(config, full, width, height, frames=200):
+    """Milliseconds per frame for mirror + conversion alone"""
+    source = SyntheticSource(width, height)
+    preprocessor = Preprocessor(BufferPool(), cv2.COLOR_BGR2RGB if full else cv2.COLOR_BGR2GRAY,
+                                config.performance.opencl, config.performance.fused_mirror)
+    ret, frame = source.read()
+    start = time.perf_counter()
+    for _ in range(frames):
+        preprocessor.prepare(frame, config.performance.detection_scale if full else 1.0)
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def monitor_process(config, full, slot, seconds, width, height, ready, results):
+    """One monitor in its own process, as deployed: reports (frames, CPU seconds) once `seconds` are up"""
+    configure_opencv(config.performance)
+    source = SyntheticSource(width, height, seed=slot)
+    clock = FrameClock(source.start_time)
+    monitor = build_monitor(full, clock, config)
+    frames = 0
+    ready.wait()
+    cpu_start = time.process_time()
+    deadline = time.perf_counter() + seconds
+    try:
+        while time.perf_counter() < deadline:
+            ret, frame = source.read()
+            clock.advance(source.last_timestamp)
+            monitor.process_frame(frame)
+            frames += 1
+    finally:
+        if hasattr(monitor, 'close'):
+            monitor.close()
+    results.put((frames, time.process_time() - cpu_start))
+
+
+def run_setting(config, full, monitors, seconds, width, height):
+    """Run `monitors` monitor processes side by side for `seconds`; returns (total FPS, CPU ms per frame)"""
+    # Every monitor loads its models before any of them starts the clock
+    ready = multiprocessing.Barrier(monitors)
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=monitor_process,
+                                       args=(config, full, slot, seconds, width, height, ready, results))
+               for slot in range(monitors)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    if any(worker.exitcode for worker in workers):
+        raise RuntimeError("A benchmark monitor process failed (see its traceback above)")
+    reports = [results.get() for _ in workers]
+    frames = sum(count for count, _ in reports)
+    cpu = sum(cpu for _, cpu in reports)
+    return frames / seconds, (cpu / frames * 1000) if frames else float('inf')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find the fastest OpenCV settings for this machine")
+    parser.add_argument('--full', action='store_true', help="Benchmark the MediaPipe monitor instead of the simplified one")
+    parser.add_argument('--monitors', type=int, default=1, help="Monitors running side by side (default 1)")
+    parser.add_argument('--seconds', type=float, default=5, help="Duration of each run (default 5)")
+    parser.add_argument('--size', default='1280x720', help="Synthetic frame size, WxH")
+    parser.add_argument('--set', dest='overrides', action='append', default=[], metavar='SECTION.KEY=VALUE',
+                        help="Keep other settings fixed while benchmarking, e.g. performance.detection_scale=0.5")
+    args = parser.parse_args()
+
+    base = build_config(parse_overrides(args.overrides))
+    width, height = (int(v) for v in args.size.lower().split('x'))
+    opencl_options = [False, True] if opencl_available() else [False]
+    fused_options = [False, True] if args.full else [False]   # Only the RGB path has a fused variant
+
+    print(f"🏁 {os.cpu_count()} cores, {args.monitors} monitor(s), {width}x{height}, "
+          f"OpenCL device: {'yes' if opencl_available() else 'no'}")
+    print(f"{'threads':>7} {'simd':>5} {'opencl':>6} {'fused':>5} {'prep ms':>8} {'FPS':>7} {'CPU ms/frame':>13}")
+
+    results = []
+    for threads, optimized, opencl, fused in itertools.product(thread_candidates(args.monitors), [True, False],
+                                                               opencl_options, fused_options):
+        config = build_config({'performance': {'opencv_threads': threads, 'use_optimized': optimized,
+                                               'opencl': opencl, 'fused_mirror': fused}}, base)
+        configure_opencv(config.performance)
+        prep = time_preprocessing(config, args.full, width, height)
+        fps, cpu = run_setting(config, args.full, args.monitors, args.seconds, width, height)
+        results.append((fps, -cpu, threads, optimized, opencl, fused))
+        print(f"{threads:>7} {str(optimized):>5} {str(opencl):>6} {str(fused):>5} {prep:>8.2f} {fps:>7.1f} {cpu:>13.2f}")
+
+    fps, cpu, threads, optimized, opencl, fused = max(results)
+    print(f"\n✅ Best: {fps:.1f} FPS ({-cpu:.2f} CPU ms/frame). Put this in desk_monitor.toml:\n")
+    print("[performance]")
+    print(f"opencv_threads = {threads}")
+    print(f"monitors_per_host = {args.monitors}")
+    print(f"use_optimized = {str(optimized).lower()}")
+    print(f"opencl = {str(opencl).lower()}")
+    if args.full:
+        print(f"fused_mirror = {str(fused).lower()}")
@@ -0,0 +1,365 @@
+"""
+Smart Desk Monitor - Frame Sources
+Camera capture with hardware-format negotiation, plus video file,
+image directory and synthetic sources for running without a webcam
+"""
+
+import os
+import sys
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+# Common UVC resolutions, probed from smallest to largest
+PROBE_RESOLUTIONS = [
+    (320, 240), (424, 240), (640, 360), (640, 480), (800, 600),
+    (960, 540), (1024, 768), (1280, 720), (1600, 900), (1920, 1080),
+]
+
+# Pixel formats we know how to ask for; YUYV needs no decode, MJPG does
+PROBE_FOURCCS = ['YUYV', 'MJPG']
+DECODE_COST = {'YUYV': 0, 'MJPG': 1}
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def fourcc_to_str(value):
+    """Convert a CAP_PROP_FOURCC value into its four-letter code"""
+    value = int(value)
+    return "".join(chr((value >> (8 * i)) & 0xFF) for i in range(4)).strip('\x00')
+
+
+class CaptureStats:
+    """Track delivered FPS and read latency of a frame source"""
+    def __init__(self, window=60):
+        self.frame_times = deque(maxlen=window)
+        self.read_latencies = deque(maxlen=window)
+        self.frames = 0
+
+    def record(self, timestamp, latency):
+        self.frame_times.append(timestamp)
+        self.read_latencies.append(latency)
+        self.frames += 1
+
+    @property
+    def fps(self):
+        """Frames per second actually delivered over the recent window"""
+        if len(self.frame_times) < 2:
+            return 0.0
+        span = self.frame_times[-1] - self.frame_times[0]
+        return (len(self.frame_times) - 1) / span if span > 0 else 0.0
+
+    @property
+    def latency_ms(self):
+        """Average time spent blocked in read(), in milliseconds"""
+        if not self.read_latencies:
+            return 0.0
+        return sum(self.read_latencies) / len(self.read_latencies) * 1000
+
+    def summary(self):
+        return f"{self.fps:.1f} FPS delivered, {self.latency_ms:.1f} ms read latency, {self.frames} frames"
+
+
+class FrameSource:
+    """Base class for anything the monitor can read frames from
+
+    Sources follow the cv2.VideoCapture interface (read/isOpened/release)
+    so the monitoring loop does not care where frames come from. Live and
+    synthetic sources reuse one frame buffer, so copy a frame to keep it
+    past the next read().
+    """
+    reuses_buffer = False
+
+    def __init__(self):
+        self.stats = CaptureStats()
+        self.last_timestamp = None
+        # Clock origin that frame timestamps are measured against
+        self.start_time = time.time()
+
+    def _grab(self):
+        raise NotImplementedError
+
+    def read(self):
+        start = time.perf_counter()
+        ret, frame = self._grab()
+        if ret:
+            self.last_timestamp = self._timestamp()
+            self.stats.record(time.perf_counter(), time.perf_counter() - start)
+        return ret, frame
+
+    def _timestamp(self):
+        """Capture time of the last frame (wall clock for live sources)"""
+        return time.time()
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+    def describe(self):
+        return self.__class__.__name__
+
+
+class CameraSource(FrameSource):
+    """Webcam capture that negotiates the cheapest mode meeting the analysis resolution"""
+    reuses_buffer = True
+
+    def __init__(self, index=0, width=1280, height=720, fps=30, buffer_size=1, probe=True):
+        super().__init__()
+        self.index = index
+        self.target = (width, height, fps)
+        self.buffer_size = buffer_size
+        self.backend = cv2.CAP_V4L2 if sys.platform.startswith('linux') else cv2.CAP_ANY
+        self.cap = cv2.VideoCapture(index, self.backend)
+        self.probe = probe
+        self.modes = []
+        self.probed = set()
+        self.mode = None
+        self.frame = None
+
+        if not self.cap.isOpened():
+            return
+
+        self.mode = self._negotiate(width, height, fps)
+        self.apply_mode(self.mode)
+
+    def _set_mode(self, fourcc, width, height, fps):
+        """Ask the driver for a mode and return what it actually granted"""
+        if fourcc:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        if fps:
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+        return (
+            fourcc_to_str(self.cap.get(cv2.CAP_PROP_FOURCC)),
+            int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            float(self.cap.get(cv2.CAP_PROP_FPS)),
+        )
+
+    def probe_modes(self, width, height, fps):
+        """Probe (fourcc, width, height, fps) modes until one covers the target
+
+        Resolutions are tried from the smallest that covers the target
+        upwards, cheapest pixel format first, so the first accepted mode
+        that is also fast enough is the one choose_mode() would pick and
+        probing stops there. Modes already tried are skipped, so a later
+        reconfigure() only probes what it hasn't seen yet.
+        """
+        for mode_width, mode_height in PROBE_RESOLUTIONS:
+            if mode_width < width or mode_height < height:
+                continue
+            for fourcc in PROBE_FOURCCS:
+                if (fourcc, mode_width, mode_height) not in self.probed:
+                    self.probed.add((fourcc, mode_width, mode_height))
+                    granted = self._set_mode(fourcc, mode_width, mode_height, 60)
+                    # Drivers silently fall back to another mode; only keep exact grants
+                    if granted[0] == fourcc and granted[1:3] == (mode_width, mode_height):
+                        self.modes.append(granted)
+                if any(m[:3] == (fourcc, mode_width, mode_height) and (m[3] == 0 or m[3] >= fps)
+                       for m in self.modes):
+                    return self.modes
+        return self.modes
+
+    def _negotiate(self, width, height, fps):
+        if self.probe:
+            self.probe_modes(width, height, fps)
+        return self.choose_mode(self.modes, width, height, fps)
+
+    @staticmethod
+    def choose_mode(modes, width, height, fps):
+        """Pick the cheapest probed mode that covers the analysis resolution and FPS"""
+        big_enough = [m for m in modes if m[1] >= width and m[2] >= height]
+        if not big_enough:
+            # Nothing covers the target; take the largest the camera offers
+            return max(modes, key=lambda m: (m[1] * m[2], m[3])) if modes else (None, width, height, fps)
+
+        # A reported FPS of 0 means the driver doesn't say, so give it the benefit of the doubt
+        fast_enough = [m for m in big_enough if m[3] == 0 or m[3] >= fps]
+        if fast_enough:
+            return min(fast_enough, key=lambda m: (m[1] * m[2], DECODE_COST.get(m[0], 2)))
+        return max(big_enough, key=lambda m: (m[3], -m[1] * m[2]))
+
+    def apply_mode(self, mode):
+        fourcc, width, height, fps = mode
+        self.mode = self._set_mode(fourcc, width, height, min(fps, self.target[2]) if fps else self.target[2])
+        # Keep the driver queue short so we always analyse the newest frame
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+
+    def reconfigure(self, width, height, fps, buffer_size=1):
+        """Switch to the cheapest mode for a new analysis resolution without reopening"""
+        if (width, height, fps) == self.target and buffer_size == self.buffer_size:
+            return
+        self.target = (width, height, fps)
+        self.buffer_size = buffer_size
+        if self.cap.isOpened():
+            self.apply_mode(self._negotiate(width, height, fps))
+            self.frame = None
+
+    def _grab(self):
+        # Decode into the previous frame's buffer instead of allocating a new one
+        ret, frame = self.cap.read(self.frame) if self.frame is not None else self.cap.read()
+        if ret:
+            self.frame = frame
+        return ret, frame
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def describe(self):
+        if self.mode is None:
+            return f"Camera {self.index} (not opened)"
+        fourcc, width, height, fps = self.mode
+        buffer_size = int(self.cap.get(cv2.CAP_PROP_BUFFERSIZE))
+        return f"Camera {self.index}: {fourcc or '?'} {width}x{height} @ {fps:.0f} FPS requested, buffer {buffer_size}"
+
+
+class VideoFileSource(FrameSource):
+    """Read frames from a recorded video file"""
+    def __init__(self, path, loop=False):
+        super().__init__()
+        self.start_time = 0.0
+        self.path = path
+        self.loop = loop
+        self.cap = cv2.VideoCapture(path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    def _grab(self):
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return ret, frame
+
+    def _timestamp(self):
+        # Use the file's own clock rather than how fast we happen to decode it
+        return self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+    def describe(self):
+        width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        return f"Video file {self.path}: {width}x{height} @ {self.fps:.0f} FPS"
+
+
+class ImageDirectorySource(FrameSource):
+    """Read a directory of still images in name order as if it were a video"""
+    def __init__(self, directory, fps=30.0, loop=False):
+        super().__init__()
+        self.start_time = 0.0
+        self.directory = directory
+        self.fps = fps
+        self.loop = loop
+        self.files = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self.position = 0
+
+    def _grab(self):
+        if self.position >= len(self.files):
+            if not self.loop or not self.files:
+                return False, None
+            self.position = 0
+        frame = cv2.imread(self.files[self.position])
+        self.position += 1
+        return frame is not None, frame
+
+    def _timestamp(self):
+        return (self.position - 1) / self.fps
+
+    def isOpened(self):
+        return self.position < len(self.files) or (self.loop and bool(self.files))
+
+    def describe(self):
+        return f"Image directory {self.directory}: {len(self.files)} images @ {self.fps:.0f} FPS"
+
+
+class SyntheticSource(FrameSource):
+    """Generate deterministic frames with a drifting face-like blob
+
+    Useful for throughput and soak tests where no camera is available.
+    Timestamps advance by exactly 1/fps per frame.
+    """
+    reuses_buffer = True
+
+    def __init__(self, width=1280, height=720, fps=30.0, num_frames=None, seed=0):
+        super().__init__()
+        self.start_time = 0.0
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.num_frames = num_frames
+        self.frame_index = 0
+        rng = np.random.default_rng(seed)
+        # Fixed noisy background so frames aren't trivially compressible
+        self.background = rng.integers(40, 90, (height, width, 3), dtype=np.uint8)
+        self.frame = np.empty_like(self.background)
+
+    def _grab(self):
+        if self.num_frames is not None and self.frame_index >= self.num_frames:
+            return False, None
+
+        t = self.frame_index / self.fps
+        np.copyto(self.frame, self.background)
+
+        cx = int(self.width * (0.5 + 0.15 * np.sin(t * 0.5)))
+        cy = int(self.height * 0.45)
+        axes = (self.width // 10, self.height // 5)
+        cv2.ellipse(self.frame, (cx, cy), axes, 0, 0, 360, (150, 180, 210), -1)
+
+        # Eyes close for a few frames every four seconds
+        eye_h = 2 if (self.frame_index % int(self.fps * 4)) < 4 else axes[1] // 8
+        for dx in (-axes[0] // 2, axes[0] // 2):
+            cv2.ellipse(self.frame, (cx + dx, cy - axes[1] // 4), (axes[0] // 5, eye_h), 0, 0, 360, (30, 30, 30), -1)
+
+        self.frame_index += 1
+        return True, self.frame
+
+    def _timestamp(self):
+        return (self.frame_index - 1) / self.fps
+
+    def isOpened(self):
+        return self.num_frames is None or self.frame_index < self.num_frames
+
+    def describe(self):
+        return f"Synthetic {self.width}x{self.height} @ {self.fps:.0f} FPS"
+
+
+def open_source(spec=0, width=1280, height=720, fps=30, buffer_size=1):
+    """Open a frame source from a command-line style spec
+
+    "0", "1", ...            camera index
+    "synthetic[:WxH]"        generated frames
+    a directory              image sequence
+    anything else            video file
+    """
+    spec = str(spec)
+    if spec.isdigit():
+        return CameraSource(int(spec), width, height, fps, buffer_size)
+    if spec.startswith('synthetic'):
+        if ':' in spec:
+            width, height = (int(v) for v in spec.split(':', 1)[1].lower().split('x'))
+        return SyntheticSource(width, height, fps)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, fps)
+    return VideoFileSource(spec)
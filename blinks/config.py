@@ -0,0 +1,317 @@
+"""
+Smart Desk Monitor - Configuration
+Typed settings loaded from a TOML file, with command-line overrides and
+hot reload between frames
+"""
+
+import ast
+import os
+import time
+from dataclasses import dataclass, field, fields, replace
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+
+REPORT_FORMATS = ('txt', 'json', 'csv', 'html', 'parquet')
+DEFAULT_CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'desk_monitor.toml')
+
+
+class ConfigError(ValueError):
+    """Raised for unreadable config files, unknown keys and out-of-range values"""
+
+
+@dataclass(frozen=True)
+class AlertConfig:
+    away_time_threshold: float = 5.0    # Seconds looking away before alert
+    alert_cooldown: float = 5.0         # Seconds between alerts
+
+
+@dataclass(frozen=True)
+class SimpleThresholds:
+    """Thresholds used by the Haar cascade monitor"""
+    distance_threshold_near: float = 1.3   # Face size ratio (too close)
+    distance_threshold_far: float = 0.7    # Face size ratio (too far)
+    min_calibration_face_size: int = 5000  # Pixels² before a face is used as baseline
+
+
+@dataclass(frozen=True)
+class FullThresholds:
+    """Thresholds used by the MediaPipe monitor"""
+    slouch_threshold: float = 0.15         # Head-forward offset as a fraction of frame width
+    distance_threshold_near: float = 150.0 # Too close to screen
+    distance_threshold_far: float = 400.0  # Too far from screen
+    blink_threshold: float = 0.2           # Eye aspect ratio threshold
+
+
+@dataclass(frozen=True)
+class HeadPoseConfig:
+    """Head angles (degrees) that still count as facing the screen (MediaPipe monitor)"""
+    max_yaw: float = 30.0          # Turned left/right
+    max_pitch: float = 25.0        # Tilted up/down
+    screen_yaw: float = 0.0        # Head angles when looking at the middle of the screen, if the
+    screen_pitch: float = 0.0      # camera isn't centred on it (pitch > 0 = looking down)
+
+
+@dataclass(frozen=True)
+class CaptureConfig:
+    source: str = '0'      # Camera index, video file, image directory or 'synthetic[:WxH]'
+    width: int = 1280
+    height: int = 720
+    fps: int = 30
+    buffer_size: int = 1
+
+
+@dataclass(frozen=True)
+class DetectionConfig:
+    """Haar cascade detectMultiScale parameters, plus the optional DNN face detector"""
+    face_scale_factor: float = 1.3
+    face_min_neighbors: int = 5
+    eye_scale_factor: float = 1.1
+    eye_min_neighbors: int = 5
+    dnn_model: str = ''            # res10 SSD .caffemodel for batch analysis ('' = Haar)
+    dnn_config: str = ''           # Matching deploy .prototxt
+    dnn_confidence: float = 0.5
+
+
+@dataclass(frozen=True)
+class PerformanceConfig:
+    detection_scale: float = 1.0   # Downscale factor applied before face detection
+    detect_every: int = 1          # Run detection every N frames, reuse results in between
+    opencv_threads: int = 0        # cv2.setNumThreads; 0 = this process's share of the cores
+    monitors_per_host: int = 1     # Monitors sharing this machine (divides the automatic thread count)
+    use_optimized: bool = True     # cv2.setUseOptimized (SIMD kernels)
+    opencl: bool = False           # Preprocess on cv2.UMat through OpenCL (T-API) when available
+    fused_mirror: bool = False     # Mirror + BGR->RGB in one strided copy (MediaPipe monitor)
+    reload_interval: float = 2.0   # Seconds between config file change checks
+    batch_size: int = 16           # Frames per detection batch in offline analysis
+    batch_workers: int = 0         # Detection threads for offline analysis; 0 = one per core
+
+
+@dataclass(frozen=True)
+class CacheConfig:
+    """Detection result cache keyed by a perceptual frame hash"""
+    enabled: bool = False      # Off for live use: a near-identical frame can hide a blink
+    max_entries: int = 256
+    max_distance: int = 0      # Accept hashes differing in up to this many bits
+    hash_size: int = 16        # Thumbnail width/height used for the hash
+
+
+@dataclass(frozen=True)
+class TrackingConfig:
+    """Multi-face tracking; only the primary user drives alerts"""
+    max_faces: int = 4             # Tracks kept at once (caps new tracks, never matching)
+    mesh_faces: int = 1            # MediaPipe max_num_faces; more runs its face detector every frame
+    iou_threshold: float = 0.3     # Minimum overlap to match a face to an existing track
+    max_age: float = 10.0          # Seconds a lost face is remembered before its session ends
+    switch_ratio: float = 1.5      # A face this much larger than the primary user's takes over
+
+
+@dataclass(frozen=True)
+class PresenceConfig:
+    """Low-power idle mode while nobody is at the desk"""
+    enabled: bool = True
+    idle_after: float = 60.0       # Seconds without a face before going idle
+    idle_width: int = 320          # Capture mode while idle
+    idle_height: int = 240
+    idle_fps: int = 5
+    redraw_interval: float = 1.0   # Seconds between window updates while idle
+
+
+@dataclass(frozen=True)
+class ReportConfig:
+    directory: str = '.'                # Where session reports are written
+    formats: str = 'txt,json,html'      # Comma-separated: txt, json, csv, html, parquet
+
+
+@dataclass(frozen=True)
+class MonitorConfig:
+    alerts: AlertConfig = field(default_factory=AlertConfig)
+    simple: SimpleThresholds = field(default_factory=SimpleThresholds)
+    full: FullThresholds = field(default_factory=FullThresholds)
+    head_pose: HeadPoseConfig = field(default_factory=HeadPoseConfig)
+    capture: CaptureConfig = field(default_factory=CaptureConfig)
+    detection: DetectionConfig = field(default_factory=DetectionConfig)
+    performance: PerformanceConfig = field(default_factory=PerformanceConfig)
+    cache: CacheConfig = field(default_factory=CacheConfig)
+    tracking: TrackingConfig = field(default_factory=TrackingConfig)
+    reports: ReportConfig = field(default_factory=ReportConfig)
+    presence: PresenceConfig = field(default_factory=PresenceConfig)
+
+
+# (section, key) -> check, for values that must stay in a sensible range
+RANGE_CHECKS = {
+    ('alerts', 'away_time_threshold'): lambda v: v >= 0,
+    ('alerts', 'alert_cooldown'): lambda v: v >= 0,
+    ('head_pose', 'max_yaw'): lambda v: 0 < v <= 90,
+    ('head_pose', 'max_pitch'): lambda v: 0 < v <= 90,
+    ('capture', 'width'): lambda v: v > 0,
+    ('capture', 'height'): lambda v: v > 0,
+    ('capture', 'fps'): lambda v: v > 0,
+    ('capture', 'buffer_size'): lambda v: v >= 1,
+    ('detection', 'face_scale_factor'): lambda v: v > 1,
+    ('detection', 'eye_scale_factor'): lambda v: v > 1,
+    ('detection', 'face_min_neighbors'): lambda v: v >= 0,
+    ('detection', 'eye_min_neighbors'): lambda v: v >= 0,
+    ('performance', 'detection_scale'): lambda v: 0 < v <= 1,
+    ('performance', 'detect_every'): lambda v: v >= 1,
+    ('performance', 'opencv_threads'): lambda v: v >= 0,
+    ('performance', 'monitors_per_host'): lambda v: v >= 1,
+    ('performance', 'reload_interval'): lambda v: v > 0,
+    ('performance', 'batch_size'): lambda v: v >= 1,
+    ('performance', 'batch_workers'): lambda v: v >= 0,
+    ('detection', 'dnn_confidence'): lambda v: 0 <= v <= 1,
+    ('cache', 'max_entries'): lambda v: v >= 1,
+    ('cache', 'max_distance'): lambda v: v >= 0,
+    ('cache', 'hash_size'): lambda v: 4 <= v <= 64,
+    ('tracking', 'max_faces'): lambda v: v >= 1,
+    ('tracking', 'mesh_faces'): lambda v: v >= 1,
+    ('tracking', 'iou_threshold'): lambda v: 0 < v <= 1,
+    ('tracking', 'max_age'): lambda v: v >= 0,
+    ('tracking', 'switch_ratio'): lambda v: v >= 1,
+    ('presence', 'idle_after'): lambda v: v > 0,
+    ('presence', 'idle_width'): lambda v: v > 0,
+    ('presence', 'idle_height'): lambda v: v > 0,
+    ('presence', 'idle_fps'): lambda v: v > 0,
+    ('presence', 'redraw_interval'): lambda v: v >= 0,
+    ('reports', 'formats'): lambda v: all(f.strip().lower() in REPORT_FORMATS for f in v.split(',') if f.strip()),
+}
+
+
+def _coerce(section, key, value, default):
+    """Convert a raw value to the type of its default, rejecting mismatches"""
+    expected = type(default)
+    if expected is float and isinstance(value, int) and not isinstance(value, bool):
+        value = float(value)
+    elif expected is str and not isinstance(value, str):
+        value = str(value)
+    if not isinstance(value, expected) or (expected is not bool and isinstance(value, bool)):
+        raise ConfigError(f"{section}.{key} must be {expected.__name__}, got {value!r}")
+    check = RANGE_CHECKS.get((section, key))
+    if check and not check(value):
+        raise ConfigError(f"{section}.{key} = {value!r} is out of range")
+    return value
+
+
+def build_config(data, base=None):
+    """Merge a nested {section: {key: value}} dict onto a MonitorConfig"""
+    config = base or MonitorConfig()
+    sections = {f.name for f in fields(MonitorConfig)}
+    for section, values in data.items():
+        if section not in sections:
+            raise ConfigError(f"Unknown config section [{section}]")
+        if not isinstance(values, dict):
+            raise ConfigError(f"[{section}] must be a table")
+        current = getattr(config, section)
+        defaults = {f.name: getattr(current, f.name) for f in fields(current)}
+        updates = {}
+        for key, value in values.items():
+            if key not in defaults:
+                raise ConfigError(f"Unknown config key {section}.{key}")
+            updates[key] = _coerce(section, key, value, defaults[key])
+        config = replace(config, **{section: replace(current, **updates)})
+    return config
+
+
+def parse_value(raw):
+    """Read a command-line value as a Python literal (number, boolean, quoted string), else a plain string"""
+    raw = raw.strip()
+    if raw.lower() in ('true', 'false'):
+        return raw.lower() == 'true'
+    try:
+        return ast.literal_eval(raw)
+    except (ValueError, SyntaxError):
+        return raw
+
+
+def parse_overrides(items):
+    """Turn ['section.key=value', ...] into a nested dict"""
+    data = {}
+    for item in items or []:
+        name, sep, raw = item.partition('=')
+        section, dot, key = name.strip().partition('.')
+        if not sep or not dot:
+            raise ConfigError(f"Override {item!r} must look like section.key=value")
+        data.setdefault(section, {})[key] = parse_value(raw)
+    return data
+
+
+def load_config(path=None, overrides=None):
+    """Load a config file (if any) and apply command-line overrides on top
+
+    Without a TOML parser the shipped desk_monitor.toml is skipped with a
+    warning (its values are the defaults anyway); a file given explicitly
+    is an error.
+    """
+    config = MonitorConfig()
+    if path and tomllib is None and os.path.abspath(path) == DEFAULT_CONFIG_FILE:
+        print("⚠️  desk_monitor.toml ignored, using built-in defaults: "
+              "reading it needs Python 3.11+ or 'pip install tomli'")
+        path = None
+    if path:
+        if tomllib is None:
+            raise ConfigError("Reading TOML config needs Python 3.11+ or 'pip install tomli'")
+        try:
+            with open(path, 'rb') as f:
+                config = build_config(tomllib.load(f), config)
+        except (OSError, tomllib.TOMLDecodeError) as e:
+            raise ConfigError(f"Can't read {path}: {e}")
+    return build_config(parse_overrides(overrides), config)
+
+
+class ConfigWatcher:
+    """Re-read the config file when it changes, checked at most every reload_interval seconds
+
+    Command-line overrides are re-applied on every reload so they keep
+    winning over the file. A broken edit is reported and the previous
+    config stays in effect.
+    """
+    def __init__(self, path, overrides=None, clock=time.monotonic):
+        self.path = path
+        self.overrides = overrides
+        self.clock = clock
+        self.config = load_config(path, overrides)
+        self.mtime = self._mtime()
+        self.next_check = clock() + self.config.performance.reload_interval
+
+    def _mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns if self.path else None
+        except OSError:
+            return None
+
+    def poll(self):
+        """Return the new config if the file changed since the last poll, else None"""
+        now = self.clock()
+        if now < self.next_check:
+            return None
+        self.next_check = now + self.config.performance.reload_interval
+
+        mtime = self._mtime()
+        if mtime is None or mtime == self.mtime:
+            return None
+        self.mtime = mtime
+
+        try:
+            config = load_config(self.path, self.overrides)
+        except ConfigError as e:
+            print(f"⚠️  Config not reloaded: {e}")
+            return None
+        if config == self.config:
+            return None
+        self.config = config
+        return config
+
+
+def add_config_arguments(parser):
+    """Add --config and --set options to an argparse parser"""
+    parser.add_argument('--config', metavar='TOML',
+                        default=DEFAULT_CONFIG_FILE if os.path.exists(DEFAULT_CONFIG_FILE) else None,
+                        help="Settings file, watched and reloaded while running (default: desk_monitor.toml)")
+    parser.add_argument('--set', dest='overrides', action='append', default=[], metavar='SECTION.KEY=VALUE',
+                        help="Override a config value, e.g. --set alerts.alert_cooldown=10 (repeatable)")
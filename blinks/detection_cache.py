@@ -0,0 +1,111 @@
+"""
+Smart Desk Monitor - Detection Cache
+LRU cache of detection results keyed by a perceptual hash of the
+downscaled grayscale frame, so static scenes and overlapping footage
+aren't analysed twice
+"""
+
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+def frame_hash(image, hash_size=16):
+    """Difference hash (dHash) of a frame as a hash_size² bit integer
+
+    Each bit says whether a pixel of the (hash_size+1) x hash_size grayscale
+    thumbnail is brighter than its right neighbour, which survives sensor
+    noise and compression but changes when something in the scene moves.
+    Colour frames are converted after downscaling, where it is cheap.
+    """
+    small = cv2.resize(image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def cache_from_config(cache_config, current=None):
+    """Build the cache described by a [cache] config section, keeping `current` if unchanged"""
+    if not cache_config.enabled:
+        return None
+    settings = (cache_config.max_entries, cache_config.max_distance, cache_config.hash_size)
+    if current is not None and (current.max_entries, current.max_distance, current.hash_size) == settings:
+        return current
+    return DetectionCache(*settings)
+
+
+class DetectionCache:
+    """Size-bounded LRU of detection results with optional near-match lookups
+
+    max_distance > 0 also accepts the closest stored hash within that many
+    differing bits (a linear scan over at most max_entries keys). Thread
+    safe, so batch workers can share one cache.
+    """
+    def __init__(self, max_entries=256, max_distance=0, hash_size=16):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.hash_size = hash_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, gray):
+        return frame_hash(gray, self.hash_size)
+
+    def get(self, key):
+        """Cached value for this hash or a near match, else None"""
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+            if self.max_distance > 0:
+                best, best_distance = None, self.max_distance + 1
+                for stored in self.entries:
+                    distance = hamming(key, stored)
+                    if distance < best_distance:
+                        best, best_distance = stored, distance
+                if best is not None:
+                    self.entries.move_to_end(best)
+                    self.near_hits += 1
+                    return self.entries[best]
+
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    @property
+    def lookups(self):
+        return self.hits + self.near_hits + self.misses
+
+    @property
+    def hit_rate(self):
+        return (self.hits + self.near_hits) / self.lookups if self.lookups else 0.0
+
+    def summary(self):
+        return (f"{self.hits} hits, {self.near_hits} near hits, {self.misses} misses "
+                f"({self.hit_rate * 100:.1f}% hit rate), {len(self.entries)}/{self.max_entries} entries, "
+                f"{self.evictions} evictions")
@@ -0,0 +1,201 @@
+"""
+Smart Desk Monitor - Face Tracker
+Identity-stable tracking of every face in view, so each person keeps their
+own calibration and statistics and only the primary user drives alerts
+"""
+
+from collections import deque
+
+
+def iou(a, b):
+    """Intersection over union of two (x, y, w, h) rectangles"""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = min(ax + aw, bx + bw) - max(ax, bx)
+    iy = min(ay + ah, by + bh) - max(ay, by)
+    if ix <= 0 or iy <= 0:
+        return 0.0
+    inter = ix * iy
+    return inter / float(aw * ah + bw * bh - inter)
+
+
+def area(rect):
+    return rect[2] * rect[3]
+
+
+class PersonSession:
+    """Calibration and statistics of one tracked person"""
+    __slots__ = ('person_id', 'first_seen', 'last_seen', 'baseline', 'present_time',
+                 'primary_time', 'focused_time', 'away_time', 'too_close_time', 'blink_counter')
+
+    def __init__(self, person_id, now):
+        self.person_id = person_id
+        self.first_seen = now
+        self.last_seen = now
+        self.baseline = None        # Calibration reference (face size or shoulder width)
+        self.reset()
+
+    def reset(self):
+        self.present_time = 0.0
+        self.primary_time = 0.0
+        self.focused_time = 0.0
+        self.away_time = 0.0
+        self.too_close_time = 0.0
+        self.blink_counter = 0
+
+    def as_dict(self):
+        return {
+            'person_id': self.person_id,
+            'first_seen': self.first_seen,
+            'last_seen': self.last_seen,
+            'baseline': float(self.baseline) if self.baseline else None,
+            'present_time': self.present_time,
+            'primary_time': self.primary_time,
+            'focused_time': self.focused_time,
+            'away_time': self.away_time,
+            'too_close_time': self.too_close_time,
+            'blink_counter': self.blink_counter,
+        }
+
+
+class Track:
+    """One face followed across frames"""
+    __slots__ = ('rect', 'index', 'last_seen', 'visible', 'session')
+
+    def __init__(self, rect, index, now, session):
+        self.rect = rect
+        self.index = index          # Position of the face in this frame's detections
+        self.last_seen = now
+        self.visible = True
+        self.session = session
+
+
+class FaceTracker:
+    """Associate face rectangles across frames and pick the primary user
+
+    Every detected face is matched to the existing tracks greedily by
+    overlap (IoU), so a tracked person keeps their track whatever else is
+    in view. Only the creation of new tracks is capped at max_faces (largest
+    faces first), which bounds a frame's work at tracks x faces IoU
+    computations. A track that isn't seen survives max_age seconds, which
+    bridges missed detections and short absences without losing the
+    person's calibration.
+
+    The primary user is the largest face when tracking starts and stays
+    primary until another face is switch_ratio times larger (someone
+    sitting down closer). Someone passing behind the user never takes over.
+    When the primary user's track expires, their session (and calibration)
+    is kept aside and nobody is primary until a face that could be them
+    shows up: one first seen after they left, either in their seat or about
+    their size. That face gets their session back.
+    """
+    def __init__(self, max_faces=4, iou_threshold=0.3, max_age=10.0, switch_ratio=1.5, history=32):
+        self.max_faces = max_faces
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.switch_ratio = switch_ratio
+        self.tracks = []
+        self.primary = None
+        self.absent = None          # The primary user's expired track, until they come back
+        self.next_id = 1
+        self.finished = deque(maxlen=history)  # Sessions of people who left, bounded for service mode
+
+    def configure(self, tracking):
+        """Apply a [tracking] config section"""
+        self.max_faces = tracking.max_faces
+        self.iou_threshold = tracking.iou_threshold
+        self.max_age = tracking.max_age
+        self.switch_ratio = tracking.switch_ratio
+
+    def update(self, rects, now):
+        """Match this frame's face rectangles to tracks; returns the primary track or None
+
+        The primary track may be returned with visible=False while the user's
+        face is briefly not detected.
+        """
+        was_visible = {id(track): track.visible for track in self.tracks}
+        for track in self.tracks:
+            track.visible = False
+
+        # Greedy assignment, best overlap first
+        pairs = sorted(((iou(track.rect, rects[j]), i, j)
+                        for i, track in enumerate(self.tracks) for j in range(len(rects))), reverse=True)
+        matched_tracks = set()
+        matched_faces = set()
+        for score, i, j in pairs:
+            if score < self.iou_threshold:
+                break
+            if i in matched_tracks or j in matched_faces:
+                continue
+            matched_tracks.add(i)
+            matched_faces.add(j)
+            track = self.tracks[i]
+            if was_visible[id(track)]:
+                track.session.present_time += now - track.last_seen
+            track.rect = rects[j]
+            track.index = j
+            track.last_seen = now
+            track.visible = True
+            track.session.last_seen = now
+
+        # Expire tracks not seen for max_age, then start tracks for new faces
+        for track in [t for t in self.tracks if not t.visible and now - t.last_seen > self.max_age]:
+            self.tracks.remove(track)
+            if track is self.primary:
+                self.primary = None
+                self.absent = track
+            else:
+                self.finished.append(track.session)
+        for j in sorted(range(len(rects)), key=lambda j: area(rects[j]), reverse=True):
+            if j not in matched_faces and len(self.tracks) < self.max_faces:
+                self.tracks.append(Track(rects[j], j, now, PersonSession(self.next_id, now)))
+                self.next_id += 1
+
+        self._choose_primary()
+        return self.primary
+
+    def _returning(self, track):
+        """Whether a visible track could be the absent primary user coming back"""
+        user = self.absent
+        return (track.session.first_seen > user.last_seen and
+                (iou(track.rect, user.rect) >= self.iou_threshold or
+                 area(track.rect) * self.switch_ratio >= area(user.rect)))
+
+    def _choose_primary(self):
+        if self.absent is not None:
+            returning = max((t for t in self.tracks if t.visible and self._returning(t)),
+                            key=lambda t: area(t.rect), default=None)
+            if returning is not None:
+                session = self.absent.session
+                session.present_time += returning.session.present_time
+                session.last_seen = returning.last_seen
+                returning.session = session
+                self.primary = returning
+                self.absent = None
+            return
+
+        largest = max((t for t in self.tracks if t.visible), key=lambda t: area(t.rect), default=None)
+        if largest is None or largest is self.primary:
+            return
+        if self.primary is None or area(largest.rect) > self.switch_ratio * area(self.primary.rect):
+            self.primary = largest
+
+    def sessions(self):
+        """Every person seen so far (up to `history` who left), in order of appearance"""
+        sessions = list(self.finished) + [track.session for track in self.tracks]
+        if self.absent is not None:
+            sessions.append(self.absent.session)
+        return sorted(sessions, key=lambda s: s.person_id)
+
+    def reset_calibration(self):
+        """Forget every person's baseline, e.g. after the capture resolution changed"""
+        for session in self.sessions():
+            session.baseline = None
+
+    def reset_statistics(self):
+        """Zero every person's statistics, keeping tracks and calibration"""
+        self.finished.clear()
+        for track in self.tracks:
+            track.session.reset()
+        if self.absent is not None:
+            self.absent.session.reset()
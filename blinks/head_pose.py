@@ -0,0 +1,105 @@
+"""
+Smart Desk Monitor - Head Pose
+Yaw, pitch and roll of the head from six face mesh landmarks with
+cv2.solvePnP, cheap enough to run on every frame
+"""
+
+import math
+
+import cv2
+import numpy as np
+
+
+# Face mesh indices: nose tip, chin, outer eye corners and mouth corners (image left, then right)
+POSE_LANDMARKS = (1, 152, 33, 263, 61, 291)
+
+# Generic face in millimetres, same order, in camera axes (x right, y down, z away from
+# the camera) with the nose tip at the origin, so a head facing the camera has zero rotation
+MODEL_POINTS = np.array([
+    (0.0, 0.0, 0.0),          # Nose tip
+    (0.0, 63.6, 12.5),        # Chin
+    (-43.3, -32.7, 26.0),     # Eye outer corner (image left)
+    (43.3, -32.7, 26.0),      # Eye outer corner (image right)
+    (-28.9, 28.9, 24.1),      # Mouth corner (image left)
+    (28.9, 28.9, 24.1),       # Mouth corner (image right)
+], dtype=np.float64)
+
+# Outer eye corner distance of the model, for the distance of a cold start guess
+MODEL_EYE_SPAN = MODEL_POINTS[3, 0] - MODEL_POINTS[2, 0]
+
+
+class HeadPose:
+    """Head pose result, reused every frame"""
+    __slots__ = ('yaw', 'pitch', 'roll', 'rvec', 'tvec')
+
+
+class HeadPoseEstimator:
+    """Solve the head pose from landmark pixels, warm-started from the previous frame
+
+    Angles are in degrees: yaw > 0 is the head turned towards the image's
+    left, pitch > 0 is looking down, roll > 0 is tilted clockwise in the
+    image. The camera matrix (focal length ~ frame width, no distortion)
+    is built once per frame size. Starting the iterative solver from the
+    last solution (useExtrinsicGuess) makes a solve several times cheaper
+    than a cold one; reset() drops it when the face changes.
+
+    A cold solve doesn't use OpenCV's own initial guess: from six noisy
+    points it often converges to a mirror solution behind the camera.
+    It starts from a head facing the camera instead, placed where the
+    nose tip is, at the distance the eye span implies.
+    """
+    def __init__(self):
+        self.frame_size = None
+        self.camera_matrix = None
+        self.dist_coeffs = np.zeros((4, 1))
+        self.image_points = np.zeros((len(POSE_LANDMARKS), 2))
+        self.pose = HeadPose()
+        self.rvec = None
+        self.tvec = None
+
+    def reset(self):
+        self.rvec = None
+        self.tvec = None
+
+    def _camera(self, frame_shape):
+        h, w = frame_shape[:2]
+        if self.frame_size != (w, h):
+            self.frame_size = (w, h)
+            self.camera_matrix = np.array([[w, 0, w / 2],
+                                           [0, w, h / 2],
+                                           [0, 0, 1]], dtype=np.float64)
+            self.reset()
+        return self.camera_matrix
+
+    def _frontal_guess(self, camera):
+        """Cold start: no rotation, nose tip on its pixel at the depth given by the eye span"""
+        focal, cx, cy = camera[0, 0], camera[0, 2], camera[1, 2]
+        eye_span = np.linalg.norm(self.image_points[3] - self.image_points[2])
+        z = focal * MODEL_EYE_SPAN / max(eye_span, 1.0)
+        u, v = self.image_points[0]
+        self.rvec = np.zeros((3, 1))
+        self.tvec = np.array([[(u - cx) * z / focal], [(v - cy) * z / focal], [z]])
+
+    def estimate(self, image_points, frame_shape):
+        """HeadPose from the POSE_LANDMARKS pixel coordinates of one face, or None if the solve fails"""
+        np.copyto(self.image_points, image_points)
+        camera = self._camera(frame_shape)
+
+        if self.rvec is None:
+            self._frontal_guess(camera)
+        ok, rvec, tvec = cv2.solvePnP(MODEL_POINTS, self.image_points, camera, self.dist_coeffs,
+                                      self.rvec, self.tvec, True, cv2.SOLVEPNP_ITERATIVE)
+        # A head behind the camera means the solver wandered off; start cold next time
+        if not ok or tvec[2, 0] <= 0:
+            self.reset()
+            return None
+        self.rvec, self.tvec = rvec, tvec
+
+        rotation, _ = cv2.Rodrigues(rvec)
+        pose = self.pose
+        pose.yaw = math.degrees(math.atan2(-rotation[2, 0], math.hypot(rotation[0, 0], rotation[1, 0])))
+        pose.pitch = math.degrees(math.atan2(rotation[2, 1], rotation[2, 2]))
+        pose.roll = math.degrees(math.atan2(rotation[1, 0], rotation[0, 0]))
+        pose.rvec = rvec
+        pose.tvec = tvec
+        return pose
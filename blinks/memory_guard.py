@@ -0,0 +1,188 @@
+"""
+Smart Desk Monitor - Memory Guard
+Reusable frame buffers plus RSS / tracemalloc tracking for all-day runs,
+so the monitor stays inside a fixed memory budget and leaks get noticed
+"""
+
+import gc
+import os
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+
+try:
+    import psutil
+except ImportError:  # Optional; /proc is used on Linux when psutil is missing
+    psutil = None
+
+
+class MemoryBudgetExceeded(RuntimeError):
+    """Raised when the process grows beyond its configured memory budget"""
+
+
+class BufferPool:
+    """Named numpy buffers that are only reallocated when the frame shape changes"""
+    def __init__(self):
+        self.buffers = {}
+
+    def get(self, name, shape, dtype=np.uint8):
+        shape = tuple(shape)
+        buffer = self.buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self.buffers[name] = buffer
+        return buffer
+
+    @property
+    def nbytes(self):
+        return sum(buffer.nbytes for buffer in self.buffers.values())
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None if it can't be read"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class MemoryMonitor:
+    """Sample RSS periodically, diff tracemalloc snapshots and enforce a budget
+
+    Call check() once per frame; it returns immediately unless a sample is
+    due. Growth is measured against the state after the warm-up period, when
+    models, buffers and caches have reached their steady size.
+
+    tracemalloc slows down every allocation, so by default only RSS is
+    sampled and tracing starts once RSS has grown trace_after_mb past the
+    warm-up level; heap diffs are then taken against that moment. Pass
+    trace=True to trace from the start (soak tests).
+    """
+    def __init__(self, budget_mb=None, max_growth_mb=None, sample_interval=10.0,
+                 snapshot_interval=600.0, warmup=60.0, trace_depth=1, trace=False,
+                 trace_after_mb=64, clock=time.monotonic):
+        self.budget = budget_mb * 1024 * 1024 if budget_mb else None
+        self.max_growth = max_growth_mb * 1024 * 1024 if max_growth_mb else None
+        self.trace = trace
+        self.trace_after = trace_after_mb * 1024 * 1024 if trace_after_mb else None
+        self.sample_interval = sample_interval
+        self.snapshot_interval = snapshot_interval
+        self.warmup = warmup
+        self.trace_depth = trace_depth
+        self.clock = clock
+
+        self.samples = deque(maxlen=4096)  # (seconds since start, rss bytes)
+        self.baseline_rss = None
+        self.baseline_snapshot = None
+        self.top_growth = []
+        self.started = None
+        self.next_sample = None
+        self.next_snapshot = None
+        self.tracing = False
+        self.owns_trace = False
+
+    def start(self):
+        self.started = self.clock()
+        self.next_sample = self.started
+        if self.trace:
+            self.start_tracing(self.started + self.warmup)
+
+    def start_tracing(self, first_snapshot):
+        """Turn on tracemalloc; the first snapshot due becomes the diff baseline"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_depth)
+            self.owns_trace = True
+        self.tracing = True
+        self.next_snapshot = first_snapshot
+
+    def stop(self):
+        if self.owns_trace and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.tracing = False
+        self.owns_trace = False
+
+    def check(self):
+        """Sample memory if due; raises MemoryBudgetExceeded when over budget"""
+        now = self.clock()
+        if now < self.next_sample:
+            return
+        self.next_sample = now + self.sample_interval
+        elapsed = now - self.started
+
+        rss = current_rss()
+        if rss is not None:
+            self.samples.append((elapsed, rss))
+            if self.baseline_rss is None and elapsed >= self.warmup:
+                self.baseline_rss = rss
+            if (not self.tracing and self.trace_after and self.baseline_rss is not None
+                    and rss - self.baseline_rss > self.trace_after):
+                print(f"🧠 RSS grew {(rss - self.baseline_rss) / 1048576:.0f} MB since warm-up - tracing allocations")
+                self.start_tracing(now)
+
+        if self.tracing and now >= self.next_snapshot:
+            self.next_snapshot = now + self.snapshot_interval
+            self.take_snapshot()
+
+        if self.budget and rss is not None and rss > self.budget:
+            # Give the collector one chance before declaring the budget blown
+            gc.collect()
+            rss = current_rss()
+            if rss is not None and rss > self.budget:
+                raise MemoryBudgetExceeded(
+                    f"RSS {rss / 1048576:.1f} MB exceeds budget {self.budget / 1048576:.1f} MB\n" + self.report()
+                )
+
+    def take_snapshot(self):
+        """Diff the Python heap against the baseline snapshot"""
+        if not self.tracing:
+            return
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        if self.baseline_snapshot is None:
+            self.baseline_snapshot = snapshot
+            return
+        stats = snapshot.compare_to(self.baseline_snapshot, 'lineno')
+        self.top_growth = [stat for stat in stats[:10] if stat.size_diff > 0]
+
+    @property
+    def rss(self):
+        return self.samples[-1][1] if self.samples else None
+
+    @property
+    def growth(self):
+        """RSS growth in bytes since the end of warm-up"""
+        if self.baseline_rss is None or not self.samples:
+            return 0
+        return self.samples[-1][1] - self.baseline_rss
+
+    def growth_rate(self):
+        """Post-warm-up RSS trend in MB per hour (least-squares slope)"""
+        points = [(t, rss) for t, rss in self.samples if t >= self.warmup]
+        if len(points) < 3:
+            return 0.0
+        t, rss = np.array(points, dtype=np.float64).T
+        slope = np.polyfit(t, rss, 1)[0]
+        return slope * 3600 / 1048576
+
+    def leak_suspected(self):
+        return self.max_growth is not None and self.growth > self.max_growth
+
+    def report(self):
+        lines = []
+        if self.rss is not None:
+            lines.append(f"RSS: {self.rss / 1048576:.1f} MB, growth since warm-up: "
+                         f"{self.growth / 1048576:+.1f} MB ({self.growth_rate():+.2f} MB/h)")
+        if self.tracing:
+            traced, peak = tracemalloc.get_traced_memory()
+            lines.append(f"Python heap: {traced / 1048576:.1f} MB (peak {peak / 1048576:.1f} MB)")
+        for stat in self.top_growth:
+            lines.append(f"   {stat}")
+        return "\n".join(lines)
@@ -0,0 +1,150 @@
+"""
+Smart Desk Monitor - Preprocessing
+Mirroring and colour conversion of incoming frames in as few full-frame
+passes as possible, optional OpenCL offload through OpenCV's T-API, and
+OpenCV thread-pool sizing coordinated with the pipeline's own workers
+"""
+
+import os
+
+import cv2
+import numpy as np
+
+
+def opencv_thread_budget(performance, workers=1):
+    """OpenCV threads for this process: the configured count, or its share of the cores
+
+    Every monitor on the host (performance.monitors_per_host) and every
+    pipeline worker thread calling into OpenCV would otherwise start a
+    full-size thread pool of its own and compete for the same cores.
+    """
+    if performance.opencv_threads:
+        return performance.opencv_threads
+    cores = os.cpu_count() or 1
+    return max(1, cores // (performance.monitors_per_host * workers))
+
+
+# Narrowest face the eye cascade runs on: its 20x20 window needs eyes of about a fifth of the face
+EYE_FACE_MIN_WIDTH = 100
+
+
+def eye_region(gray, face, scale=1.0):
+    """A face's region of a grayscale frame for eye detection; returns (region, its scale)
+
+    Eyes are searched at the face detection scale too, which cuts the eye
+    cascade's cost by about the square of the scale, but never on a face
+    narrower than EYE_FACE_MIN_WIDTH pixels.
+    """
+    x, y, w, h = face
+    roi = gray[y:y+h, x:x+w]
+    scale = max(scale, min(1.0, EYE_FACE_MIN_WIDTH / max(w, 1)))
+    if scale >= 1.0:
+        return roi, 1.0
+    return cv2.resize(roi, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA), scale
+
+
+def opencl_available():
+    try:
+        return cv2.ocl.haveOpenCL()
+    except cv2.error:
+        return False
+
+
+def configure_opencv(performance, workers=1):
+    """Apply thread count, optimized-kernel and OpenCL settings; returns the thread count"""
+    threads = opencv_thread_budget(performance, workers)
+    cv2.setNumThreads(threads)
+    cv2.setUseOptimized(performance.use_optimized)
+    if opencl_available():
+        cv2.ocl.setUseOpenCL(performance.opencl)
+    return threads
+
+
+def describe_opencv():
+    return (f"OpenCV {cv2.__version__}: {cv2.getNumThreads()} threads, "
+            f"optimized {'on' if cv2.useOptimized() else 'off'}, "
+            f"OpenCL {'on' if opencl_available() and cv2.ocl.useOpenCL() else 'off'}")
+
+
+class Preprocessor:
+    """Mirror a raw frame and produce the image detection runs on
+
+    The detection image is only converted on frames that are actually
+    detected, and when it is downscaled the resize happens before the
+    conversion so the conversion touches fewer pixels. Outputs go into
+    pooled buffers.
+
+    With fused=True a full-size RGB detection image is built straight from
+    the raw frame in one strided copy (mirror and BGR -> RGB are both
+    reversed views), instead of converting the mirrored frame. Whether
+    that beats flip + cvtColor depends on the CPU - benchmark.py measures
+    both.
+
+    With opencl=True the work runs on cv2.UMat through the T-API. That
+    only pays off with a real OpenCL device (check with benchmark.py).
+    The device buffers are kept between frames; the final download
+    (UMat.get) still returns a new array, OpenCV's Python bindings can't
+    download into an existing one.
+    """
+    def __init__(self, buffers, conversion, opencl=False, fused=False):
+        self.buffers = buffers
+        self.conversion = conversion
+        self.channels = 1 if conversion == cv2.COLOR_BGR2GRAY else 3
+        self.opencl = opencl and opencl_available()
+        self.fused = fused and conversion == cv2.COLOR_BGR2RGB
+        self.umats = {}
+
+    def _shape(self, height, width):
+        return (height, width) if self.channels == 1 else (height, width, self.channels)
+
+    def prepare(self, frame, scale=1.0, convert=True):
+        """Return (mirrored BGR frame, converted detection image or None)"""
+        if self.opencl:
+            return self._prepare_umat(frame, scale, convert)
+
+        mirrored = cv2.flip(frame, 1, dst=self.buffers.get('frame', frame.shape))
+        if not convert:
+            return mirrored, None
+
+        if self.fused and scale >= 1.0:
+            converted = self.buffers.get('converted', frame.shape)
+            np.copyto(converted, frame[:, ::-1, ::-1])
+            return mirrored, converted
+
+        source = mirrored
+        if scale < 1.0:
+            size = self._scaled_size(frame, scale)
+            source = cv2.resize(mirrored, size, dst=self.buffers.get('small', (size[1], size[0], 3)),
+                                interpolation=cv2.INTER_AREA)
+        converted = cv2.cvtColor(source, self.conversion,
+                                 dst=self.buffers.get('converted', self._shape(*source.shape[:2])))
+        return mirrored, converted
+
+    @staticmethod
+    def _scaled_size(frame, scale):
+        h, w = frame.shape[:2]
+        return max(1, int(round(w * scale))), max(1, int(round(h * scale)))
+
+    def _umat(self, name, height, width, channels):
+        """Device buffer reused across frames, reallocated only when its size changes"""
+        umat = self.umats.get(name)
+        key = (height, width, channels)
+        if umat is None or umat[0] != key:
+            umat = self.umats[name] = (key, cv2.UMat(height, width, cv2.CV_8UC(channels)))
+        return umat[1]
+
+    def _prepare_umat(self, frame, scale, convert):
+        h, w = frame.shape[:2]
+        upload = self._umat('upload', h, w, 3)
+        cv2.copyTo(frame, None, dst=upload)
+        mirrored = cv2.flip(upload, 1, dst=self._umat('frame', h, w, 3))
+        if not convert:
+            return mirrored.get(), None
+        source = mirrored
+        if scale < 1.0:
+            size = self._scaled_size(frame, scale)
+            source = cv2.resize(mirrored, size, dst=self._umat('small', size[1], size[0], 3),
+                                interpolation=cv2.INTER_AREA)
+            h, w = size[1], size[0]
+        converted = cv2.cvtColor(source, self.conversion, dst=self._umat('converted', h, w, self.channels))
+        return mirrored.get(), converted.get()
@@ -0,0 +1,148 @@
+"""
+Smart Desk Monitor - Presence Detection
+Drop to a cheap low-resolution, low-FPS idle mode when nobody has been at
+the desk for a while, and go back to full monitoring as soon as a face
+shows up again
+"""
+
+import time
+
+import cv2
+
+from memory_guard import BufferPool
+
+
+ACTIVE = 'active'
+IDLE = 'idle'
+
+
+class PresenceController:
+    """Active/idle state machine driven by face presence
+
+    Active: the monitor runs its full pipeline and reports whether it saw
+    a face; after idle_after seconds without one the camera is switched to
+    the idle mode. Idle: every frame gets a single Haar face check on a
+    small grayscale copy and the window is only redrawn every
+    redraw_interval seconds. The first face found switches the camera back,
+    so the next frame is fully monitored again.
+
+    Wall time uses the monitor's clock; CPU time is process_time(), so the
+    saving can be estimated from the CPU cost per second of each mode.
+    """
+    def __init__(self, config, detection, clock=time.time):
+        self.clock = clock
+        self.configure(config, detection)
+        self.cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        self.buffers = BufferPool()
+        self.state = ACTIVE
+        self.last_seen = clock()
+        self.mode_start = clock()
+        self.cpu_start = time.process_time()
+        self.mode_time = {ACTIVE: 0.0, IDLE: 0.0}
+        self.mode_cpu = {ACTIVE: 0.0, IDLE: 0.0}
+        self.idle_periods = 0
+        self.next_redraw = 0.0
+        self.preview = None
+
+    def configure(self, config, detection):
+        """Apply the [presence] and [detection] config sections"""
+        self.config = config
+        self.detection = detection
+
+    @property
+    def idle(self):
+        return self.state == IDLE
+
+    def _switch(self, state):
+        now = self.clock()
+        cpu = time.process_time()
+        self.mode_time[self.state] += now - self.mode_start
+        self.mode_cpu[self.state] += cpu - self.cpu_start
+        self.mode_start = now
+        self.cpu_start = cpu
+        self.state = state
+
+    def observe(self, face_present, cap):
+        """Active mode: record the monitor's detection result; returns True on entering idle"""
+        now = self.clock()
+        if face_present:
+            self.last_seen = now
+            return False
+        if now - self.last_seen < self.config.idle_after:
+            return False
+
+        self._switch(IDLE)
+        self.idle_periods += 1
+        self.next_redraw = 0.0
+        if hasattr(cap, 'reconfigure'):
+            cap.reconfigure(self.config.idle_width, self.config.idle_height, self.config.idle_fps)
+        print(f"💤 No one seen for {self.config.idle_after:.0f}s - idle mode")
+        return True
+
+    def detect(self, frame):
+        """Idle mode: cheap face check on a small mirrored grayscale copy"""
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.config.idle_width / w)
+        size = (max(1, int(w * scale)), max(1, int(h * scale)))
+        small = frame
+        if scale < 1.0:
+            small = cv2.resize(frame, size, dst=self.buffers.get('small', (size[1], size[0], 3)),
+                               interpolation=cv2.INTER_AREA)
+        self.preview = cv2.flip(small, 1, dst=self.buffers.get('preview', small.shape))
+        gray = cv2.cvtColor(self.preview, cv2.COLOR_BGR2GRAY, dst=self.buffers.get('gray', small.shape[:2]))
+        faces = self.cascade.detectMultiScale(gray, self.detection.face_scale_factor,
+                                              self.detection.face_min_neighbors)
+        return len(faces) > 0
+
+    def wake(self, cap, capture):
+        """Face found while idle: restore the full capture mode for the next frame"""
+        self._switch(ACTIVE)
+        self.last_seen = self.clock()
+        if hasattr(cap, 'reconfigure'):
+            cap.reconfigure(capture.width, capture.height, capture.fps, capture.buffer_size)
+        print("👋 Welcome back - full monitoring")
+
+    def should_redraw(self):
+        """Idle mode: whether the window is due for an update"""
+        now = self.clock()
+        if now < self.next_redraw:
+            return False
+        self.next_redraw = now + self.config.redraw_interval
+        return True
+
+    def idle_frame(self):
+        """The small preview frame with an idle banner"""
+        frame = self.preview
+        cv2.putText(frame, "Idle - waiting for you", (10, frame.shape[0] - 15),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+        return frame
+
+    def summary(self):
+        """Time and CPU spent in each mode, and the CPU time idle mode saved"""
+        # Include the mode we're currently in without closing it
+        now = self.clock()
+        cpu = time.process_time()
+        times = dict(self.mode_time)
+        cpus = dict(self.mode_cpu)
+        times[self.state] += now - self.mode_start
+        cpus[self.state] += cpu - self.cpu_start
+
+        active_rate = cpus[ACTIVE] / times[ACTIVE] if times[ACTIVE] > 0 else 0.0
+        idle_rate = cpus[IDLE] / times[IDLE] if times[IDLE] > 0 else 0.0
+        return {
+            'active_time': times[ACTIVE],
+            'idle_time': times[IDLE],
+            'active_cpu': cpus[ACTIVE],
+            'idle_cpu': cpus[IDLE],
+            'idle_periods': self.idle_periods,
+            # What the idle time would have cost at the active mode's CPU rate
+            'cpu_saved': max(active_rate - idle_rate, 0.0) * times[IDLE],
+        }
+
+    def report(self):
+        s = self.summary()
+        active_load = s['active_cpu'] / s['active_time'] * 100 if s['active_time'] > 0 else 0.0
+        idle_load = s['idle_cpu'] / s['idle_time'] * 100 if s['idle_time'] > 0 else 0.0
+        return (f"active {s['active_time'] / 60:.1f} min ({active_load:.0f}% CPU), "
+                f"idle {s['idle_time'] / 60:.1f} min ({idle_load:.0f}% CPU) in {s['idle_periods']} periods, "
+                f"~{s['cpu_saved']:.0f} CPU-seconds saved")
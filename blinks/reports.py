@@ -0,0 +1,439 @@
+"""
+Smart Desk Monitor - Session Reports
+Render session statistics as text, JSON, CSV, Parquet and HTML (with
+inline SVG charts), either on a background thread while the monitor runs
+or in bulk over many stored sessions
+
+    python reports.py reports/*.json --out rerendered --formats html
+    python reports.py signals/*.npz --out reports --workers 8
+"""
+
+import argparse
+import csv
+import html
+import json
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+try:
+    import pandas as pd
+except ImportError:  # Parquet export is optional
+    pd = None
+
+from config import REPORT_FORMATS as FORMATS
+
+
+class ReportError(ValueError):
+    """Raised for unknown report formats and unreadable session files"""
+
+
+def parse_formats(formats):
+    """'txt,json' -> ('txt', 'json'), rejecting unknown formats"""
+    names = tuple(name.strip().lower() for name in formats.split(',') if name.strip())
+    unknown = [name for name in names if name not in FORMATS]
+    if unknown:
+        raise ReportError(f"Unknown report format(s): {', '.join(unknown)} (choose from {', '.join(FORMATS)})")
+    return names
+
+
+def ratio(part, whole):
+    return part / whole if whole > 0 else 0.0
+
+
+def summarize(snapshot):
+    """Flat per-session metrics derived from a statistics snapshot
+
+    Every rate is guarded, so a report right after a reset (zero duration)
+    is all zeros instead of a ZeroDivisionError.
+    """
+    duration = snapshot['session_duration']
+    full = snapshot['monitor'] == 'full'
+    blinks = snapshot['blink_counter']
+    if full:
+        problem_time = snapshot['total_slouch_time']
+        good_time = max(duration - problem_time, 0.0)
+        avg_blink_rate = ratio(blinks, duration / 60)
+    else:
+        problem_time = snapshot['total_too_close_time']
+        good_time = snapshot['total_good_posture_time']
+        avg_blink_rate = ratio(blinks, duration / 60) if duration > 60 else 0.0
+    return {
+        'date': snapshot['date'],
+        'monitor': snapshot['monitor'],
+        'session_start': snapshot['session_start'],
+        'session_duration': duration,
+        'focused_time': snapshot['total_focused_time'],
+        'away_time': snapshot['total_away_time'],
+        'focus_rate': ratio(snapshot['total_focused_time'], duration) * 100,
+        'blink_counter': blinks,
+        'avg_blink_rate': avg_blink_rate,
+        'good_posture_time': good_time,
+        'slouch_time' if full else 'too_close_time': problem_time,
+        'posture_score': ratio(good_time, duration) * 100,
+        'people': len(snapshot.get('people', ())),
+        'idle_time': snapshot.get('presence', {}).get('idle_time', 0.0),
+        'cpu_saved': snapshot.get('presence', {}).get('cpu_saved', 0.0),
+    }
+
+
+def format_duration(seconds, hours=False):
+    if hours:
+        return f"{int(seconds // 3600)}h {int((seconds % 3600) // 60)}m {int(seconds % 60)}s"
+    return f"{int(seconds // 60)}m {int(seconds % 60)}s"
+
+
+def recommendations(snapshot, summary):
+    """Advice lines for the session, as (ok, text) pairs"""
+    duration = summary['session_duration']
+    blink_rate = summary['avg_blink_rate']
+    tips = []
+    if snapshot['monitor'] == 'full':
+        if ratio(summary['slouch_time'], duration) > 0.3:
+            tips.append((False, "You slouched frequently. Consider ergonomic chair adjustments."))
+        if duration > 0 and blink_rate < 12:
+            tips.append((False, "Low blink rate detected. Take breaks and use the 20-20-20 rule."))
+        if ratio(summary['away_time'], duration) > 0.4:
+            tips.append((False, "Frequently distracted. Try time-blocking or focus techniques."))
+        if summary['focus_rate'] > 80:
+            tips.append((True, "Excellent focus! Keep up the good work."))
+        if summary['posture_score'] > 80:
+            tips.append((True, "Great posture maintained throughout the session!"))
+    else:
+        if ratio(summary['too_close_time'], duration) > 0.3:
+            tips.append((False, "Sitting too close frequently. Adjust your desk setup."))
+        if blink_rate < 12:
+            tips.append((False, "Low blink rate. Follow the 20-20-20 rule: Every 20 min,\n"
+                                "       look at something 20 feet away for 20 seconds."))
+        if ratio(summary['away_time'], duration) > 0.4:
+            tips.append((False, "Frequently distracted. Consider focus techniques like Pomodoro."))
+        if summary['focus_rate'] > 75:
+            tips.append((True, "Excellent focus maintained! Great job!"))
+        if summary['posture_score'] > 80:
+            tips.append((True, "Good distance from screen maintained!"))
+        if 12 <= blink_rate <= 25:
+            tips.append((True, "Healthy blink rate - your eyes are well hydrated!"))
+    return tips
+
+
+def render_text(snapshot, summary=None):
+    """The classic boxed plain-text report"""
+    summary = summary or summarize(snapshot)
+    full = snapshot['monitor'] == 'full'
+    duration = summary['session_duration']
+
+    if full:
+        posture = f"""🪑 POSTURE ANALYSIS
+   Good Posture: {int(summary['good_posture_time'] // 60)}m
+   Slouching Time: {format_duration(summary['slouch_time'])}
+   Posture Score: {summary['posture_score']:.1f}%"""
+        blink_status = ""
+    else:
+        posture = f"""🪑 POSTURE ANALYSIS
+   Good Distance: {int(summary['good_posture_time'] // 60)}m
+   Too Close: {int(summary['too_close_time'] // 60)}m
+   Posture Score: {summary['posture_score']:.1f}%"""
+        blink_status = f"\n   Status: {'✅ Good' if 12 <= summary['avg_blink_rate'] <= 25 else '⚠️ Needs attention'}"
+
+    report = f"""
+╔══════════════════════════════════════════════════════════╗
+║        SMART DESK MONITOR - SESSION REPORT              ║
+╚══════════════════════════════════════════════════════════╝
+
+📅 Date: {summary['date']}
+
+⏱️  SESSION DURATION
+   Total Time: {format_duration(duration, hours=True)}
+
+👁️  ATTENTION & FOCUS
+   Focused Time: {format_duration(summary['focused_time'])}
+   Looking Away: {format_duration(summary['away_time'])}
+   Focus Rate: {summary['focus_rate']:.1f}%
+
+👀 BLINK STATISTICS
+   Total Blinks: {summary['blink_counter']}
+   Avg Blink Rate: {summary['avg_blink_rate']:.1f} blinks/min
+   Recommended: 15-20 blinks/min{blink_status}
+
+{posture}
+
+💡 RECOMMENDATIONS
+"""
+    for ok, text in recommendations(snapshot, summary):
+        report += f"   {'✅' if ok else '⚠️ '} {text}\n"
+
+    people = snapshot.get('people', ())
+    if len(people) > 1:
+        report += "\n👥 PEOPLE SEEN\n"
+        for person in people:
+            report += (f"   #{person['person_id']}: present {format_duration(person['present_time'])}, "
+                       f"primary user {format_duration(person['primary_time'])}, "
+                       f"{person['blink_counter']} blinks\n")
+
+    presence = snapshot.get('presence')
+    if presence:
+        report += (f"\n🔋 POWER\n"
+                   f"   Full monitoring: {format_duration(presence['active_time'])}\n"
+                   f"   Idle (nobody at the desk): {format_duration(presence['idle_time'])} "
+                   f"in {presence['idle_periods']} periods\n"
+                   f"   CPU time saved: ~{presence['cpu_saved']:.0f}s\n")
+
+    report += "\n" + "="*60 + "\n"
+    return report
+
+
+def _svg_bars(items, width=560, bar_height=26):
+    """Horizontal bar chart of (label, seconds, colour) as inline SVG"""
+    longest = max((value for _, value, _ in items), default=0) or 1
+    rows = []
+    for i, (label, value, color) in enumerate(items):
+        y = i * (bar_height + 8)
+        length = (width - 200) * value / longest
+        rows.append(f'<text x="0" y="{y + bar_height * 0.7:.0f}">{html.escape(label)}</text>'
+                    f'<rect x="130" y="{y}" width="{length:.1f}" height="{bar_height}" fill="{color}"/>'
+                    f'<text x="{136 + length:.1f}" y="{y + bar_height * 0.7:.0f}">{format_duration(value)}</text>')
+    height = len(items) * (bar_height + 8)
+    return f'<svg width="{width}" height="{height}" font-size="13">{"".join(rows)}</svg>'
+
+
+def _svg_blinks(snapshot, width=560, height=140):
+    """Blinks per minute over the session as an inline SVG column chart"""
+    duration = snapshot['session_duration']
+    minutes = max(int(duration // 60) + 1, 1)
+    counts = [0] * minutes
+    if 'blinks_per_minute' in snapshot:
+        for minute, count in enumerate(snapshot['blinks_per_minute'][:minutes]):
+            counts[minute] = count
+    else:
+        # Reports written before the per-minute history only kept the last 100 blinks
+        for t in snapshot.get('blink_times', ()):
+            minute = int((t - snapshot['session_start']) // 60)
+            if 0 <= minute < minutes:
+                counts[minute] += 1
+    peak = max(max(counts), 20)
+    column = width / minutes
+    bars = "".join(
+        f'<rect x="{i * column:.1f}" y="{height - count / peak * height:.1f}" '
+        f'width="{max(column - 1, 1):.1f}" height="{count / peak * height:.1f}" fill="#3b82f6">'
+        f'<title>minute {i + 1}: {count} blinks</title></rect>'
+        for i, count in enumerate(counts))
+    # Shaded band for the recommended 15-20 blinks/min
+    band = (f'<rect x="0" y="{height - 20 / peak * height:.1f}" width="{width}" '
+            f'height="{5 / peak * height:.1f}" fill="#22c55e" opacity="0.15"/>')
+    return f'<svg width="{width}" height="{height}">{band}{bars}</svg>'
+
+
+def render_html(snapshot, summary=None):
+    """Self-contained HTML report with inline SVG charts"""
+    summary = summary or summarize(snapshot)
+    full = snapshot['monitor'] == 'full'
+    times = [
+        ("Focused", summary['focused_time'], "#22c55e"),
+        ("Looking away", summary['away_time'], "#eab308"),
+        ("Good posture" if full else "Good distance", summary['good_posture_time'], "#3b82f6"),
+        ("Slouching" if full else "Too close", summary['slouch_time' if full else 'too_close_time'], "#f97316"),
+    ]
+    tips = "".join(f"<li>{'✅' if ok else '⚠️'} {html.escape(text)}</li>"
+                   for ok, text in recommendations(snapshot, summary))
+    people = "".join(
+        f"<tr><td>#{p['person_id']}</td><td>{format_duration(p['present_time'])}</td>"
+        f"<td>{format_duration(p['primary_time'])}</td><td>{format_duration(p['focused_time'])}</td>"
+        f"<td>{p['blink_counter']}</td></tr>"
+        for p in snapshot.get('people', ()))
+    people_table = (f"<h2>People</h2><table><tr><th>ID</th><th>Present</th><th>Primary user</th>"
+                    f"<th>Focused</th><th>Blinks</th></tr>{people}</table>") if people else ""
+
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Session report {html.escape(summary['date'])}</title>
+<style>
+body {{ font-family: system-ui, sans-serif; max-width: 640px; margin: 2em auto; color: #222; }}
+.metrics {{ display: flex; gap: 1.5em; }} .metrics div {{ font-size: 1.6em; font-weight: bold; }}
+.metrics span {{ display: block; font-size: 0.5em; font-weight: normal; color: #666; }}
+table {{ border-collapse: collapse; }} td, th {{ padding: 4px 10px; border-bottom: 1px solid #ddd; }}
+</style></head><body>
+<h1>🖥️ Smart Desk Monitor - Session Report</h1>
+<p>📅 {html.escape(summary['date'])} &middot; {format_duration(summary['session_duration'], hours=True)}</p>
+<div class="metrics">
+<div>{summary['focus_rate']:.1f}%<span>focus rate</span></div>
+<div>{summary['posture_score']:.1f}%<span>posture score</span></div>
+<div>{summary['avg_blink_rate']:.1f}<span>blinks/min</span></div>
+</div>
+<h2>Time</h2>{_svg_bars(times)}
+<h2>Blinks per minute</h2>{_svg_blinks(snapshot)}
+<p><small>Green band: recommended 15-20 blinks/min</small></p>
+<h2>Recommendations</h2><ul>{tips}</ul>
+{people_table}
+</body></html>
+"""
+
+
+def write_table(rows, path):
+    """Write summary rows as CSV or Parquet, depending on the extension"""
+    if path.endswith('.parquet'):
+        if pd is None:
+            raise ReportError("Parquet export needs 'pip install pandas pyarrow'")
+        pd.DataFrame(rows).to_parquet(path, index=False)
+        return
+    fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def write_reports(snapshot, directory='.', formats=('txt',), basename=None):
+    """Render one snapshot in every requested format; returns (summary, written paths, text)"""
+    summary = summarize(snapshot)
+    if basename is None:
+        stamp = datetime.strptime(summary['date'], "%Y-%m-%d %H:%M:%S").strftime("%Y-%m-%d_%H-%M-%S")
+        basename = f"session_report_{stamp}"
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, basename)
+    text = render_text(snapshot, summary)
+    paths = []
+
+    for fmt in formats:
+        path = f"{base}.{fmt}"
+        if fmt == 'parquet' and pd is None:
+            print("⚠️  Skipping Parquet report: needs 'pip install pandas pyarrow'")
+            continue
+        if fmt == 'txt':
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        elif fmt == 'json':
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'summary': summary, 'statistics': snapshot}, f, indent=2)
+        elif fmt in ('csv', 'parquet'):
+            write_table([summary], path)
+        elif fmt == 'html':
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(render_html(snapshot, summary))
+        paths.append(path)
+    return summary, paths, text
+
+
+class ReportWriter:
+    """Render and write reports on a background thread so the video keeps running
+
+    The monitor hands over a snapshot (a plain dict copied on its own
+    thread); everything after that happens off the capture loop.
+    """
+    def __init__(self, directory='.', formats=('txt',), echo=True):
+        self.directory = directory
+        self.formats = formats
+        self.echo = echo
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='reports')
+
+    def configure(self, reports_config):
+        """Apply a [reports] config section"""
+        self.directory = reports_config.directory
+        self.formats = parse_formats(reports_config.formats)
+
+    def submit(self, snapshot):
+        future = self.executor.submit(write_reports, snapshot, self.directory, self.formats)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        try:
+            summary, paths, text = future.result()
+        except Exception as e:  # Report failures must never take the monitor down
+            print(f"⚠️  Session report not saved: {e}")
+            return
+        for path in paths:
+            print(f"\n📄 Session report saved to: {path}")
+        if self.echo:
+            print(text)
+
+    def close(self):
+        """Wait for pending reports"""
+        self.executor.shutdown(wait=True)
+
+
+def load_snapshot(path):
+    """Read a session from a JSON report or an .npz signal file"""
+    if path.endswith('.npz'):
+        from session_analytics import SessionSignals, simple_statistics
+        try:
+            signals = SessionSignals.load(path)
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+            raise ReportError(f"Can't read session {path}: {e}")
+        stats = simple_statistics(signals)
+        stats.update(monitor='simple', session_duration=stats['duration'],
+                     date=datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y-%m-%d %H:%M:%S"))
+        return stats
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data['statistics']
+    except (OSError, ValueError, KeyError) as e:
+        raise ReportError(f"Can't read session {path}: {e}")
+
+
+def render_file(job):
+    """Bulk worker: load one stored session and write its reports; returns its summary row
+
+    A session that can't be read or rendered gives a {'source', 'error'}
+    row instead, so one bad file doesn't stop a bulk run.
+    """
+    path, directory, formats = job
+    basename = os.path.splitext(os.path.basename(path))[0]
+    try:
+        summary, _, _ = write_reports(load_snapshot(path), directory, formats, basename)
+    except (ReportError, OSError, KeyError, TypeError) as e:
+        # KeyError / TypeError: a readable JSON file that isn't a session report
+        return {'source': path, 'error': str(e) or type(e).__name__}
+    summary['source'] = path
+    return summary
+
+
+def render_bulk(paths, directory, formats, workers=None):
+    """Render reports for many stored sessions across processes; returns the rows of render_file
+
+    Sessions are handed out in chunks so thousands of small jobs don't
+    pay one inter-process round trip each.
+    """
+    workers = workers or os.cpu_count() or 1
+    jobs = [(path, directory, formats) for path in paths]
+    chunksize = max(1, len(jobs) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(render_file, jobs, chunksize=chunksize))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render reports for stored sessions in parallel")
+    parser.add_argument('sessions', nargs='+', help="JSON reports or .npz signal files (batch_analysis.py --save-signals)")
+    parser.add_argument('--out', default='reports', help="Output directory (default: reports)")
+    parser.add_argument('--formats', default='json,csv,html', help=f"Comma-separated, from: {', '.join(FORMATS)}")
+    parser.add_argument('--workers', type=int, default=None, help="Processes (default: one per core)")
+    parser.add_argument('--summary', default='sessions.csv',
+                        help="Combined table of all sessions, .csv or .parquet (default: sessions.csv)")
+    args = parser.parse_args()
+
+    try:
+        formats = parse_formats(args.formats)
+    except ReportError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    rows = render_bulk(args.sessions, args.out, formats, args.workers)
+    failures = [row for row in rows if 'error' in row]
+    rows = [row for row in rows if 'error' not in row]
+    summary_path = os.path.join(args.out, args.summary)
+    try:
+        if rows:
+            write_table(rows, summary_path)
+    except ReportError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+    print(f"📄 {len(rows)} sessions rendered to {args.out}/ in {elapsed:.1f}s"
+          + (f", summary: {summary_path}" if rows else ""))
+    if failures:
+        print(f"❌ {len(failures)} sessions failed:", file=sys.stderr)
+        for row in failures:
+            print(f"   {row['source']}: {row['error']}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,434 @@
+"""
+Smart Desk Monitor - Session Analytics
+Vectorized passes over per-frame signal arrays that reproduce the live
+monitor's blink counting, focus/away intervals, alerts and time statistics
+without replaying frames, so thresholds can be swept over stored sessions
+
+    python session_analytics.py day1.npz day2.npz \\
+        --sweep alerts.away_time_threshold=3,5,8 --sweep simple.distance_threshold_near=1.2,1.3,1.5
+"""
+
+import argparse
+import itertools
+import sys
+import time
+
+import numpy as np
+
+from config import MonitorConfig, ConfigError, build_config, parse_overrides, parse_value
+
+
+class SessionSignals:
+    """Per-frame signals of one session, stored as parallel NumPy arrays
+
+    timestamps     capture time of each frame (seconds)
+    face_detected  bool, a face was found
+    face_size      face rectangle area in pixels (0 without a face)
+    face_center_x  face centre as a fraction of frame width (NaN without a face)
+    eyes           number of eyes detected inside the face
+    ear            eye aspect ratio from face landmarks (NaN when not measured)
+    """
+    FIELDS = ('timestamps', 'face_detected', 'face_size', 'face_center_x', 'eyes', 'ear')
+
+    def __init__(self, timestamps, face_detected, face_size, face_center_x, eyes, ear=None, session_start=None):
+        self.timestamps = np.asarray(timestamps, dtype=np.float64)
+        self.face_detected = np.asarray(face_detected, dtype=bool)
+        self.face_size = np.asarray(face_size, dtype=np.int64)
+        self.face_center_x = np.asarray(face_center_x, dtype=np.float64)
+        self.eyes = np.asarray(eyes, dtype=np.int16)
+        if ear is None:
+            ear = np.full(len(self.timestamps), np.nan)
+        self.ear = np.asarray(ear, dtype=np.float64)
+        if session_start is None:
+            session_start = self.timestamps[0] if len(self.timestamps) else 0.0
+        self.session_start = float(session_start)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def save(self, path):
+        np.savez_compressed(path, session_start=self.session_start,
+                            **{name: getattr(self, name) for name in self.FIELDS})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            # Older files were written before the EAR column existed
+            columns = [data[name] if name in data else None for name in cls.FIELDS]
+            return cls(*columns, session_start=float(data['session_start']))
+
+
+def run_lengths(values):
+    """Run-length encode a 1-D array: returns (starts, lengths, run values)"""
+    values = np.asarray(values)
+    if len(values) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, values[:0]
+    change = np.flatnonzero(values[1:] != values[:-1]) + 1
+    starts = np.concatenate(([0], change))
+    lengths = np.diff(np.concatenate((starts, [len(values)])))
+    return starts, lengths, values[starts]
+
+
+def next_after(times, refractory):
+    """Index of the first time more than `refractory` after each time (len(times) if none)
+
+    One vectorized binary search. `times + refractory` can round either
+    way, so the indices are then nudged until the rule is the live
+    monitor's `t - last > refractory` exactly.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    n = len(times)
+    nxt = np.searchsorted(times, times + refractory, side='right')
+    index = np.arange(n)
+    while True:
+        back = nxt - 1 > index
+        back[back] = times[nxt[back] - 1] - times[back] > refractory
+        if not back.any():
+            break
+        nxt[back] -= 1
+    while True:
+        ahead = nxt < n
+        ahead[ahead] = ~(times[nxt[ahead]] - times[ahead] > refractory)
+        if not ahead.any():
+            break
+        nxt[ahead] += 1
+    return nxt
+
+
+def follow_cooldown(times, jump, refractory, last_time):
+    """Indices of the events the cooldown rule keeps, given each event's next eligible one
+
+    An event more than `refractory` after both `last_time` and the event
+    before it is always kept and starts a chain; chains are followed by
+    pointer doubling, so the number of vectorized steps grows with the log
+    of the longest chain rather than with the number of kept events.
+    """
+    n = len(times)
+    eligible = times - last_time > refractory
+    if not eligible.any():
+        return np.zeros(0, dtype=np.int64)
+    reached = np.zeros(n + 1, dtype=bool)
+    reached[1:n] = eligible[1:] & (np.diff(times) > refractory)
+    reached[np.argmax(eligible)] = True
+
+    # After k rounds `reached` holds the first 2**k events of every chain and
+    # step[i] is the event 2**k hops after i (n = past the end)
+    step = np.append(jump, n)
+    while True:
+        targets = step[np.flatnonzero(reached[:n])]
+        if (reached[targets] | (targets == n)).all():
+            break
+        reached[targets] = True
+        step = step[step]
+    return np.flatnonzero(reached[:n])
+
+
+def apply_refractory(times, refractory, last_time):
+    """Keep events more than `refractory` seconds after the previously kept one
+
+    This is the live monitor's cooldown rule (`now - last > cooldown`),
+    computed without a Python loop over events.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    return times[follow_cooldown(times, next_after(times, refractory), refractory, last_time)]
+
+
+class Cooldown:
+    """The cooldown rule over any subset of one session's frames
+
+    next_after() runs once over all frame timestamps; the jump table of a
+    subset is then a lookup, so thresholds that only change which frames
+    are candidates never search again.
+    """
+    def __init__(self, timestamps, refractory):
+        self.timestamps = np.asarray(timestamps, dtype=np.float64)
+        self.refractory = refractory
+        self.next_frame = next_after(self.timestamps, refractory)
+
+    def apply(self, mask, last_time=0.0):
+        """Times of the frames in `mask` that the cooldown rule keeps"""
+        frames = np.flatnonzero(mask)
+        # Position of the first candidate at or after each candidate's next eligible frame
+        jump = np.searchsorted(frames, self.next_frame[frames])
+        times = self.timestamps[frames]
+        return times[follow_cooldown(times, jump, self.refractory, last_time)]
+
+
+def eye_count_blinks(timestamps, eyes, min_frames=2, max_frames=8, refractory=0.2, last_blink_time=0.0):
+    """Blink times from per-frame eye counts (simplified monitor)
+
+    A blink is a run of 2-8 frames with fewer than two eyes, counted on the
+    frame where both eyes reappear. Only frames with a face should be passed.
+    """
+    closed = np.asarray(eyes) < 2
+    starts, lengths, is_closed = run_lengths(closed)
+    ends = starts + lengths  # index of the frame where the run is over
+    valid = is_closed & (lengths >= min_frames) & (lengths <= max_frames) & (ends < len(closed))
+    return apply_refractory(np.asarray(timestamps)[ends[valid]], refractory, last_blink_time)
+
+
+def ear_blinks(timestamps, ear, threshold=0.2, refractory=0.3, last_blink_time=0.0):
+    """Blink times from per-frame eye aspect ratio (MediaPipe monitor)
+
+    Any frame with EAR below the threshold counts, at most one per
+    `refractory` seconds. NaN (no face) never counts.
+    """
+    closed = np.asarray(ear) < threshold
+    return apply_refractory(np.asarray(timestamps)[closed], refractory, last_blink_time)
+
+
+def intervals(timestamps, mask, end_time=None):
+    """Start/end times of each run where mask is True
+
+    A run ends at the timestamp of the first frame after it, or at
+    end_time (default: the last timestamp) for a run reaching the end.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    starts, lengths, values = run_lengths(np.asarray(mask, dtype=bool))
+    starts, lengths = starts[values], lengths[values]
+    ends = starts + lengths
+    if end_time is None:
+        end_time = timestamps[-1] if len(timestamps) else 0.0
+    end_times = np.append(timestamps, end_time)[ends]
+    return timestamps[starts], end_times
+
+
+def simple_masks(signals, config):
+    """Per-frame focused / too-close masks and calibration baseline (simplified monitor)"""
+    face = signals.face_detected
+    calibration = np.flatnonzero(face & (signals.face_size > config.simple.min_calibration_face_size))
+    too_close = np.zeros(len(signals), dtype=bool)
+    ratio = np.zeros(len(signals))
+    baseline = None
+    if len(calibration):
+        first = calibration[0]
+        baseline = int(signals.face_size[first])
+        ratio[first:] = signals.face_size[first:] / baseline
+        too_close[first:] = ratio[first:] > config.simple.distance_threshold_near
+    too_close &= face
+    return {
+        'focused': face & (signals.eyes >= 1),
+        'too_close': too_close,
+        'size_ratio': ratio,
+        'baseline': baseline,
+    }
+
+
+def blinks_per_minute(blink_times, session_start):
+    """Blink counts per session minute, up to the last blink (the monitors' report history)"""
+    minutes = np.maximum((np.asarray(blink_times) - session_start) // 60, 0).astype(int)
+    return np.bincount(minutes).tolist()
+
+
+def simple_statistics(signals, config=None, masks=None):
+    """Reproduce SimplifiedDeskMonitor's session statistics from stored signals"""
+    config = config or MonitorConfig()
+    masks = masks or simple_masks(signals, config)
+    t = signals.timestamps
+    face = signals.face_detected
+    focused, too_close = masks['focused'], masks['too_close']
+
+    # update_statistics credits each frame with the time since the previous one
+    dt = np.diff(t, prepend=signals.session_start)
+    blinks = eye_count_blinks(t[face], signals.eyes[face], last_blink_time=signals.session_start)
+
+    return {
+        'session_start': signals.session_start,
+        'frames': len(t),
+        'duration': float(t[-1] - signals.session_start) if len(t) else 0.0,
+        'total_focused_time': float(dt[focused].sum()),
+        'total_away_time': float(dt[~focused].sum()),
+        'total_too_close_time': float(dt[focused & too_close].sum()),
+        'total_good_posture_time': float(dt[focused & ~too_close].sum()),
+        'blink_counter': int(len(blinks)),
+        'blinks_per_minute': blinks_per_minute(blinks, signals.session_start),
+        'baseline_face_size': masks['baseline'],
+    }
+
+
+def focus_timeline(signals, config=None, masks=None):
+    """Run-length encoded focused and away intervals as (start times, end times)"""
+    config = config or MonitorConfig()
+    masks = masks or simple_masks(signals, config)
+    return {
+        'focused': intervals(signals.timestamps, masks['focused']),
+        'away': intervals(signals.timestamps, ~masks['focused']),
+        'too_close': intervals(signals.timestamps, masks['too_close']),
+    }
+
+
+def alert_timeline(signals, config=None, masks=None):
+    """Times at which the live monitor would sound attention and distance alerts"""
+    config = config or MonitorConfig()
+    masks = masks or simple_masks(signals, config)
+    t = signals.timestamps
+    away = ~masks['focused']
+
+    # Time since the current away run began, for every frame (looking_away_start)
+    starts, lengths, values = run_lengths(away)
+    run_start = np.repeat(t[starts], lengths)
+    overdue = away & (t - run_start > config.alerts.away_time_threshold)
+
+    cooldown = config.alerts.alert_cooldown
+    return {
+        'attention': apply_refractory(t[overdue], cooldown, 0.0),
+        'distance': apply_refractory(t[masks['too_close']], cooldown, 0.0),
+    }
+
+
+def too_close_time_curve(signals, thresholds, config=None):
+    """Total too-close time for many distance_threshold_near values at once
+
+    Sorting the focused frames by size ratio once turns each threshold into
+    a binary search over a cumulative sum.
+    """
+    config = config or MonitorConfig()
+    masks = simple_masks(signals, config)
+    dt = np.diff(signals.timestamps, prepend=signals.session_start)
+    ratio = masks['size_ratio'][masks['focused']]
+    weights = dt[masks['focused']]
+    order = np.argsort(ratio, kind='stable')
+    cumulative = np.concatenate(([0.0], np.cumsum(weights[order][::-1])))[::-1]
+    index = np.searchsorted(ratio[order], np.asarray(thresholds, dtype=np.float64), side='right')
+    return cumulative[index]
+
+
+def expand_grid(grid):
+    """{'section.key': [values]} -> list of override dicts, one per combination"""
+    names = list(grid)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(grid[name] for name in names))]
+
+
+class SweepSession:
+    """One session prepared for scoring many threshold combinations
+
+    Frame durations, focus totals, blink events and how long each frame
+    has been part of an away run don't depend on the swept thresholds, so
+    they are computed once. Too-close time comes from too_close_time_curve()
+    for every distance threshold in the sweep at once, and alert times are
+    memoised on only the settings they depend on, so the cooldown filter
+    runs once per distinct (threshold, cooldown) pair rather than once per
+    combination.
+    """
+    def __init__(self, signals, near_thresholds):
+        self.signals = signals
+        self.near_thresholds = near_thresholds
+        t = signals.timestamps
+        face = signals.face_detected
+
+        self.dt = np.diff(t, prepend=signals.session_start)
+        self.focused = face & (signals.eyes >= 1)
+        self.focused_time = float(self.dt[self.focused].sum())
+        self.away_time = float(self.dt[~self.focused].sum())
+        self.blink_count = len(eye_count_blinks(t[face], signals.eyes[face],
+                                                last_blink_time=signals.session_start))
+
+        # Seconds since the current away run began, for every frame (looking_away_start)
+        starts, lengths, values = run_lengths(~self.focused)
+        self.away_for = t - np.repeat(t[starts], lengths)
+
+        self.too_close_time = {}    # min_calibration_face_size -> {threshold: seconds}
+        self.cooldowns = {}         # alert_cooldown -> Cooldown
+        self.attention = {}         # (away_time_threshold, alert_cooldown) -> alert count
+        self.distance = {}          # (min_calibration_face_size, threshold, alert_cooldown) -> alert count
+
+    def _cooldown(self, seconds):
+        if seconds not in self.cooldowns:
+            self.cooldowns[seconds] = Cooldown(self.signals.timestamps, seconds)
+        return self.cooldowns[seconds]
+
+    def score(self, config):
+        """Numeric totals of simple_statistics() plus alert counts for one combination"""
+        signals = self.signals
+        simple, alerts = config.simple, config.alerts
+        near = simple.distance_threshold_near
+
+        curve = self.too_close_time.get(simple.min_calibration_face_size)
+        if curve is None:
+            times = too_close_time_curve(signals, self.near_thresholds, config)
+            curve = self.too_close_time[simple.min_calibration_face_size] = dict(zip(self.near_thresholds, times))
+
+        key = (alerts.away_time_threshold, alerts.alert_cooldown)
+        if key not in self.attention:
+            overdue = ~self.focused & (self.away_for > alerts.away_time_threshold)
+            self.attention[key] = len(self._cooldown(alerts.alert_cooldown).apply(overdue))
+
+        key = (simple.min_calibration_face_size, near, alerts.alert_cooldown)
+        if key not in self.distance:
+            too_close = simple_masks(signals, config)['too_close']
+            self.distance[key] = len(self._cooldown(alerts.alert_cooldown).apply(too_close))
+
+        too_close_time = float(curve[near])
+        return {
+            'frames': len(signals),
+            'duration': float(signals.timestamps[-1] - signals.session_start) if len(signals) else 0.0,
+            'total_focused_time': self.focused_time,
+            'total_away_time': self.away_time,
+            'total_too_close_time': too_close_time,
+            'total_good_posture_time': self.focused_time - too_close_time,
+            'blink_counter': self.blink_count,
+            'attention_alerts': self.attention[(alerts.away_time_threshold, alerts.alert_cooldown)],
+            'distance_alerts': self.distance[key],
+        }
+
+
+def sweep(sessions, grid, config=None):
+    """Score every threshold combination in `grid` over one or more sessions
+
+    Returns a list of (overrides, totals) with statistics and alert counts
+    summed over all sessions.
+    """
+    config = config or MonitorConfig()
+    combos = [(overrides, build_config(parse_overrides(f"{k}={v!r}" for k, v in overrides.items()), config))
+              for overrides in expand_grid(grid)]
+    near_thresholds = sorted({combo.simple.distance_threshold_near for _, combo in combos})
+    prepared = [SweepSession(signals, near_thresholds) for signals in sessions]
+
+    results = []
+    for overrides, combo in combos:
+        totals = {}
+        for session in prepared:
+            for key, value in session.score(combo).items():
+                totals[key] = totals.get(key, 0) + value
+        results.append((overrides, totals))
+    return results
+
+
+def parse_sweep(items):
+    """['section.key=v1,v2,...', ...] -> grid dict"""
+    grid = {}
+    for item in items:
+        name, sep, values = item.partition('=')
+        if not sep:
+            raise ConfigError(f"Sweep {item!r} must look like section.key=v1,v2,...")
+        grid[name.strip()] = [parse_value(v) for v in values.split(',')]
+    return grid
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute or sweep statistics over stored session signals")
+    parser.add_argument('signals', nargs='+', help="Signal files written by batch_analysis.py --save-signals")
+    parser.add_argument('--sweep', action='append', default=[], metavar='SECTION.KEY=V1,V2,...',
+                        help="Threshold values to try (repeatable; all combinations are scored)")
+    args = parser.parse_args()
+
+    try:
+        grid = parse_sweep(args.sweep)
+    except ConfigError as e:
+        parser.error(str(e))
+
+    sessions = [SessionSignals.load(path) for path in args.signals]
+    start = time.perf_counter()
+    results = sweep(sessions, grid)
+    elapsed = time.perf_counter() - start
+
+    columns = ['total_focused_time', 'total_away_time', 'total_too_close_time',
+               'blink_counter', 'attention_alerts', 'distance_alerts']
+    print("  ".join(list(grid) + columns))
+    for overrides, totals in results:
+        print("  ".join([str(overrides[name]) for name in grid] +
+                        [f"{totals.get(c, 0):.1f}" if isinstance(totals.get(c), float) else str(totals.get(c, 0))
+                         for c in columns]))
+    frames = sum(len(s) for s in sessions)
+    print(f"\n⚡ {len(results)} combinations x {frames} frames in {elapsed:.2f}s", file=sys.stderr)
@@ -0,0 +1,152 @@
+"""
+Smart Desk Monitor - Session Recording & Replay
+Record raw sessions (compressed frames + capture timestamps + key presses)
+and replay them through a monitor with an injected clock, so a session's
+statistics can be reproduced exactly
+"""
+
+import json
+import struct
+import time
+
+import cv2
+import numpy as np
+
+from capture import FrameSource
+
+
+MAGIC = b'DSKREC1\n'
+HEADER = struct.Struct('<d')       # clock value when the monitor was created
+RECORD = struct.Struct('<dhI')     # capture timestamp, key code (-1 = none), payload length
+NO_KEY = -1
+
+# Keys that change engine state and must be replayed; 'q' and 's' only affect the UI / files
+REPLAYED_KEYS = (ord('r'), ord('c'))
+
+
+class FrameClock:
+    """Clock that reports the capture time of the frame being processed
+
+    Passed to a monitor in place of time.time(), it makes every timing
+    decision depend only on the recorded timestamps.
+    """
+    def __init__(self, start=None):
+        self.now = time.time() if start is None else start
+
+    def advance(self, timestamp):
+        self.now = timestamp
+
+    def __call__(self):
+        return self.now
+
+
+class SessionRecorder:
+    """Append frames to a recording file as JPEG with their capture timestamps"""
+    def __init__(self, path, start_time, quality=90):
+        self.path = path
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC)
+        self.file.write(HEADER.pack(start_time))
+        self.frames = 0
+        self._pending = None
+
+    def encode(self, frame):
+        """Compress a frame and return the decoded copy the engine should analyse
+
+        JPEG is lossy, so analysing the decoded frame is what keeps the live
+        statistics identical to a later replay of the same file.
+        """
+        ok, payload = cv2.imencode('.jpg', frame, self.params)
+        if not ok:
+            raise RuntimeError("Failed to encode frame for recording")
+        self._pending = payload
+        return cv2.imdecode(payload, cv2.IMREAD_COLOR)
+
+    def write(self, timestamp, key=NO_KEY):
+        """Write the last encoded frame together with the key pressed after it"""
+        payload = self._pending
+        self.file.write(RECORD.pack(timestamp, key, len(payload)))
+        self.file.write(payload.tobytes())
+        self._pending = None
+        self.frames += 1
+
+    def close(self):
+        self.file.close()
+
+
+class RecordingSource(FrameSource):
+    """Frame source that reads back a session recording"""
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.file = open(path, 'rb')
+        if self.file.read(len(MAGIC)) != MAGIC:
+            self.file.close()
+            raise ValueError(f"{path} is not a session recording")
+        self.start_time, = HEADER.unpack(self.file.read(HEADER.size))
+        self.last_key = NO_KEY
+        self._recorded_timestamp = None
+        self._eof = False
+
+    def _grab(self):
+        header = self.file.read(RECORD.size)
+        if len(header) < RECORD.size:
+            self._eof = True
+            return False, None
+        self._recorded_timestamp, self.last_key, length = RECORD.unpack(header)
+        payload = np.frombuffer(self.file.read(length), dtype=np.uint8)
+        return True, cv2.imdecode(payload, cv2.IMREAD_COLOR)
+
+    def _timestamp(self):
+        return self._recorded_timestamp
+
+    def isOpened(self):
+        return not self._eof
+
+    def release(self):
+        self.file.close()
+
+    def describe(self):
+        return f"Recording {self.path}"
+
+
+def replay(path, monitor_factory):
+    """Feed a recording through a fresh monitor as fast as possible
+
+    monitor_factory(clock) must build a monitor using the given clock. The
+    monitor is driven through process_frame() and handle_key() only, with
+    sound muted and nothing displayed. Returns the monitor's statistics.
+    """
+    source = RecordingSource(path)
+    clock = FrameClock(source.start_time)
+    monitor = monitor_factory(clock)
+    monitor.sound_enabled = False
+
+    try:
+        while True:
+            ret, frame = source.read()
+            if not ret:
+                break
+            clock.advance(source.last_timestamp)
+            monitor.process_frame(frame)
+            if source.last_key in REPLAYED_KEYS:
+                monitor.handle_key(source.last_key)
+    finally:
+        source.release()
+
+    stats = monitor.get_statistics()
+    if hasattr(monitor, 'close'):
+        monitor.close()
+    return stats
+
+
+def check_statistics(stats, expected_path):
+    """Compare replayed statistics with a stored JSON file; returns a list of mismatches"""
+    with open(expected_path, 'r', encoding='utf-8') as f:
+        expected = json.load(f)
+    return [
+        f"{key}: expected {expected.get(key)!r}, got {stats.get(key)!r}"
+        for key in sorted(set(expected) | set(stats))
+        if expected.get(key) != stats.get(key)
+    ]
@@ -7,49 +7,120 @@ import cv2
 import mediapipe as mp
 import numpy as np
 import time
-import winsound
-from datetime import datetime, timedelta
+try:
+    import winsound
+except ImportError:
+    # Not on Windows: alerts fall back to the terminal bell
+    winsound = None
+from datetime import datetime
 from collections import deque
 import threading
+import argparse
+import json
+import sys
+
+from capture import CameraSource, open_source
+from session_recording import FrameClock, SessionRecorder, replay, check_statistics, REPLAYED_KEYS, NO_KEY
+from memory_guard import BufferPool, MemoryMonitor, MemoryBudgetExceeded
+from config import MonitorConfig, ConfigWatcher, ConfigError, add_config_arguments
+from detection_cache import cache_from_config
+from face_tracker import FaceTracker
+from preprocess import Preprocessor, configure_opencv, describe_opencv
+from reports import ReportWriter
+from presence import PresenceController
+from head_pose import HeadPoseEstimator, POSE_LANDMARKS
+
+
+class PostureInfo:
+    """Posture result, reused every frame instead of allocating a dict"""
+    __slots__ = ('slouching', 'too_close', 'too_far', 'head_shoulder_offset',
+                 'shoulder_distance', 'nose_coords', 'shoulder_midpoint')
+
+
+class AttentionInfo:
+    """Attention result, reused every frame instead of allocating a dict"""
+    __slots__ = ('looking_at_screen', 'blink_rate', 'total_blinks', 'eye_aspect_ratio', 'facing_screen', 'head_pose')
+
+
+# Face oval extremes (forehead, chin, cheeks): enough for a tracking box
+FACE_BOX_LANDMARKS = (10, 152, 234, 454)
+LEFT_EYE_LANDMARKS = (33, 160, 158, 133, 153, 144)
+RIGHT_EYE_LANDMARKS = (362, 385, 387, 263, 373, 380)
+
+# The only face mesh landmarks the monitor reads, and their rows in a face_points() array
+FACE_LANDMARKS = FACE_BOX_LANDMARKS + LEFT_EYE_LANDMARKS + RIGHT_EYE_LANDMARKS + POSE_LANDMARKS
+FACE_BOX_ROWS = slice(0, 4)
+LEFT_EYE_ROWS = slice(4, 10)
+RIGHT_EYE_ROWS = slice(10, 16)
+HEAD_POSE_ROWS = slice(16, 22)
+NOSE_ROW = 16
+
+VISIBILITY_THRESHOLD = 0.5
+
+
+def pose_points(pose_landmarks):
+    """Pose landmarks as a (33, 3) float32 array of normalised x, y and visibility, or None"""
+    if pose_landmarks is None:
+        return None
+    return np.array([(l.x, l.y, l.visibility) for l in pose_landmarks.landmark], dtype=np.float32)
+
+
+def face_points(face_landmarks):
+    """The FACE_LANDMARKS of one face mesh as a (22, 2) float32 array of normalised x, y"""
+    landmark = face_landmarks.landmark
+    return np.array([(landmark[i].x, landmark[i].y) for i in FACE_LANDMARKS], dtype=np.float32)
+
 
 class SmartDeskMonitor:
-    def __init__(self):
+    def __init__(self, clock=None, config=None):
+        # Injected clock (defaults to wall time) so sessions can be replayed
+        self.clock = clock or time.time
+        self.sound_enabled = True
+        
+        # Per-frame buffers and result objects, reused to keep memory flat
+        self.buffers = BufferPool()
+        self.posture_info = PostureInfo()
+        self.attention_info = AttentionInfo()
+        
         # Initialize MediaPipe components
         self.mp_pose = mp.solutions.pose
         self.mp_face_mesh = mp.solutions.face_mesh
-        self.mp_drawing = mp.solutions.drawing_utils
         
-        # Initialize pose and face mesh
+        # Initialize pose (face mesh is sized from the tracking config)
         self.pose = self.mp_pose.Pose(
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5
         )
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
-        
-        # Monitoring parameters
-        self.slouch_threshold = 0.15  # Angle threshold for slouching
-        self.distance_threshold_near = 150  # Too close to screen
-        self.distance_threshold_far = 400  # Too far from screen
-        self.away_time_threshold = 5  # Seconds looking away before alert
-        self.blink_threshold = 0.2  # Eye aspect ratio threshold
+        self.face_mesh = None
+        
+        # Every face in view is tracked; the primary user's session drives alerts
+        self.tracker = FaceTracker()
+        self.person = None
+        self.head_pose = HeadPoseEstimator()
+        
+        # Monitoring parameters and performance knobs (see config.py)
+        self.config = None
+        self.cache = None
+        self.report_writer = ReportWriter()
+        self.presence = None
+        self.face_present = False
+        self.apply_config(config or MonitorConfig())
+        self.frame_index = 0
+        self.last_results = (None, ())
         
         # Tracking variables
         self.looking_away_start = None
         self.blink_counter = 0
-        self.blink_times = deque(maxlen=100)
-        self.last_blink_time = time.time()
+        self.blink_times = deque(maxlen=100)      # Recent blinks, for the live blink rate
+        self.blinks_per_minute = []               # Whole-session history, for reports
+        self.last_blink_time = self.clock()
         
         # Session statistics
-        self.session_start = time.time()
+        self.session_start = self.clock()
         self.total_slouch_time = 0
         self.total_away_time = 0
         self.total_focused_time = 0
-        self.last_posture_check = time.time()
+        self.last_posture_check = self.clock()
         self.is_slouching = False
         self.is_looking_away = False
         
@@ -57,12 +128,91 @@ class SmartDeskMonitor:
         self.last_posture_alert = 0
         self.last_distance_alert = 0
         self.last_attention_alert = 0
-        self.alert_cooldown = 5  # Seconds between alerts
         
         # Reference measurements (calibrated on first good frame)
         self.reference_shoulder_distance = None
         self.calibrated = False
         
+    def apply_config(self, config):
+        """Apply thresholds and performance knobs; safe to call between frames"""
+        previous = self.config
+        self.config = config
+        self.slouch_threshold = config.full.slouch_threshold
+        self.distance_threshold_near = config.full.distance_threshold_near
+        self.distance_threshold_far = config.full.distance_threshold_far
+        self.blink_threshold = config.full.blink_threshold
+        self.head_pose_limits = config.head_pose
+        self.away_time_threshold = config.alerts.away_time_threshold
+        self.alert_cooldown = config.alerts.alert_cooldown
+        self.detection_scale = config.performance.detection_scale
+        self.detect_every = config.performance.detect_every
+        configure_opencv(config.performance)
+        self.preprocessor = Preprocessor(self.buffers, cv2.COLOR_BGR2RGB, config.performance.opencl,
+                                         config.performance.fused_mirror)
+        self.tracker.configure(config.tracking)
+        self.report_writer.configure(config.reports)
+        
+        # Face mesh has to be rebuilt to track a different number of faces
+        faces_changed = previous is None or previous.tracking.mesh_faces != config.tracking.mesh_faces
+        if faces_changed:
+            if self.face_mesh is not None:
+                self.face_mesh.close()
+            self.face_mesh = self.mp_face_mesh.FaceMesh(
+                max_num_faces=config.tracking.mesh_faces,
+                refine_landmarks=True,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
+        
+        # Cached landmarks are only valid for the input size and face count that produced them
+        self.cache = cache_from_config(config.cache, self.cache)
+        if self.cache and previous and (faces_changed or
+                                        previous.performance.detection_scale != self.detection_scale):
+            self.cache.clear()
+    
+    def detect_landmarks(self, rgb_frame):
+        """Run pose and face mesh on an RGB frame, answering from the cache when possible
+
+        Returns (pose points or None, [face points, ...]). Only the landmarks
+        the monitor reads are copied out of MediaPipe's results, so neither
+        the cache nor last_results keeps MediaPipe result objects alive.
+        """
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(rgb_frame)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        pose_results = self.pose.process(rgb_frame)
+        face_results = self.face_mesh.process(rgb_frame)
+        results = (pose_points(pose_results.pose_landmarks),
+                   [face_points(face) for face in face_results.multi_face_landmarks or ()])
+        if key is not None:
+            self.cache.put(key, results)
+        return results
+    
+    def track_faces(self, faces, frame_shape):
+        """Follow every face with the tracker; returns the primary user's face points or None"""
+        h, w = frame_shape[:2]
+        rects = []
+        for face in faces:
+            box = face[FACE_BOX_ROWS]
+            x0, y0 = box.min(axis=0) * (w, h)
+            x1, y1 = box.max(axis=0) * (w, h)
+            rects.append((int(x0), int(y0), int(x1 - x0), int(y1 - y0)))
+        
+        track = self.tracker.update(rects, self.clock())
+        if track is not None and track.session is not self.person:
+            # A different person became the primary user: switch to their calibration
+            self.person = track.session
+            self.head_pose.reset()
+            self.reference_shoulder_distance = self.person.baseline
+            self.calibrated = self.person.baseline is not None
+        if track is None or not track.visible:
+            return None
+        return faces[track.index]
+    
     def calculate_angle(self, a, b, c):
         """Calculate angle between three points"""
         a = np.array(a)
@@ -94,23 +244,18 @@ class SmartDeskMonitor:
         ear = (v1 + v2) / (2.0 * h)
         return ear
     
-    def check_posture(self, pose_landmarks, frame_shape):
+    def check_posture(self, pose_points, frame_shape):
         """Analyze posture and detect slouching"""
         h, w = frame_shape[:2]
         
-        # Get key landmarks
-        left_shoulder = pose_landmarks.landmark[self.mp_pose.PoseLandmark.LEFT_SHOULDER]
-        right_shoulder = pose_landmarks.landmark[self.mp_pose.PoseLandmark.RIGHT_SHOULDER]
-        left_ear = pose_landmarks.landmark[self.mp_pose.PoseLandmark.LEFT_EAR]
-        right_ear = pose_landmarks.landmark[self.mp_pose.PoseLandmark.RIGHT_EAR]
-        nose = pose_landmarks.landmark[self.mp_pose.PoseLandmark.NOSE]
-        
-        # Convert to pixel coordinates
-        left_shoulder_coords = [left_shoulder.x * w, left_shoulder.y * h]
-        right_shoulder_coords = [right_shoulder.x * w, right_shoulder.y * h]
-        left_ear_coords = [left_ear.x * w, left_ear.y * h]
-        right_ear_coords = [right_ear.x * w, right_ear.y * h]
-        nose_coords = [nose.x * w, nose.y * h]
+        # Key landmarks in pixel coordinates
+        landmark = self.mp_pose.PoseLandmark
+        pixels = pose_points[:, :2].astype(np.float64) * (w, h)
+        left_shoulder_coords = pixels[landmark.LEFT_SHOULDER].tolist()
+        right_shoulder_coords = pixels[landmark.RIGHT_SHOULDER].tolist()
+        left_ear_coords = pixels[landmark.LEFT_EAR].tolist()
+        right_ear_coords = pixels[landmark.RIGHT_EAR].tolist()
+        nose_coords = pixels[landmark.NOSE].tolist()
         
         # Calculate shoulder midpoint
         shoulder_midpoint = [
@@ -134,6 +279,8 @@ class SmartDeskMonitor:
         if not self.calibrated and shoulder_distance > 50:
             self.reference_shoulder_distance = shoulder_distance
             self.calibrated = True
+            if self.person is not None:
+                self.person.baseline = shoulder_distance
         
         # Estimate distance from camera (inverse of shoulder width)
         distance_ratio = 1.0
@@ -144,31 +291,24 @@ class SmartDeskMonitor:
         is_too_close = shoulder_distance > self.distance_threshold_near if self.reference_shoulder_distance else False
         is_too_far = shoulder_distance < self.distance_threshold_far if self.reference_shoulder_distance else False
         
-        return {
-            'slouching': is_slouching,
-            'too_close': is_too_close,
-            'too_far': is_too_far,
-            'head_shoulder_offset': head_shoulder_offset,
-            'shoulder_distance': shoulder_distance,
-            'nose_coords': nose_coords,
-            'shoulder_midpoint': shoulder_midpoint
-        }
+        info = self.posture_info
+        info.slouching = is_slouching
+        info.too_close = is_too_close
+        info.too_far = is_too_far
+        info.head_shoulder_offset = head_shoulder_offset
+        info.shoulder_distance = shoulder_distance
+        info.nose_coords = nose_coords
+        info.shoulder_midpoint = shoulder_midpoint
+        return info
     
-    def check_attention(self, face_landmarks, frame_shape):
+    def check_attention(self, face, frame_shape):
         """Check if user is looking at screen and track blinks"""
         h, w = frame_shape[:2]
         
-        # Get eye landmarks (MediaPipe Face Mesh indices)
-        # Left eye: 33, 160, 158, 133, 153, 144
-        # Right eye: 362, 385, 387, 263, 373, 380
-        
-        left_eye_indices = [33, 160, 158, 133, 153, 144]
-        right_eye_indices = [362, 385, 387, 263, 373, 380]
-        
-        left_eye = [(face_landmarks.landmark[i].x * w, face_landmarks.landmark[i].y * h) 
-                    for i in left_eye_indices]
-        right_eye = [(face_landmarks.landmark[i].x * w, face_landmarks.landmark[i].y * h) 
-                     for i in right_eye_indices]
+        # Eye landmarks in pixel coordinates (see LEFT_EYE_LANDMARKS / RIGHT_EYE_LANDMARKS)
+        pixels = face.astype(np.float64) * (w, h)
+        left_eye = pixels[LEFT_EYE_ROWS]
+        right_eye = pixels[RIGHT_EYE_ROWS]
         
         # Calculate eye aspect ratios
         left_ear = self.eye_aspect_ratio(left_eye)
@@ -177,41 +317,52 @@ class SmartDeskMonitor:
         
         # Detect blink
         if avg_ear < self.blink_threshold:
-            current_time = time.time()
+            current_time = self.clock()
             if current_time - self.last_blink_time > 0.3:  # Minimum time between blinks
                 self.blink_counter += 1
-                self.blink_times.append(current_time)
+                if self.person is not None:
+                    self.person.blink_counter += 1
+                self.record_blink(current_time)
                 self.last_blink_time = current_time
         
         # Calculate blink rate (blinks per minute)
-        current_time = time.time()
-        recent_blinks = [t for t in self.blink_times if current_time - t < 60]
-        blink_rate = len(recent_blinks)
-        
-        # Get head pose (using nose and eyes)
-        nose = face_landmarks.landmark[1]
-        nose_coords = (nose.x * w, nose.y * h)
-        
-        # Simple attention check: face is centered and eyes are open
-        face_center_x = nose.x
-        is_centered = 0.3 < face_center_x < 0.7
+        current_time = self.clock()
+        blink_rate = sum(1 for t in self.blink_times if current_time - t < 60)
+        
+        # Head pose: is the head actually turned towards the screen?
+        pose = self.head_pose.estimate(pixels[HEAD_POSE_ROWS], frame_shape)
+        limits = self.head_pose_limits
+        if pose is not None:
+            facing_screen = (abs(pose.yaw - limits.screen_yaw) <= limits.max_yaw and
+                             abs(pose.pitch - limits.screen_pitch) <= limits.max_pitch)
+        else:
+            # No solution this frame: fall back to a centred nose
+            facing_screen = 0.3 < face[NOSE_ROW, 0] < 0.7
         eyes_open = avg_ear > self.blink_threshold
         
-        is_looking_at_screen = is_centered and eyes_open
+        is_looking_at_screen = facing_screen and eyes_open
         
-        return {
-            'looking_at_screen': is_looking_at_screen,
-            'blink_rate': blink_rate,
-            'total_blinks': self.blink_counter,
-            'eye_aspect_ratio': avg_ear,
-            'is_centered': is_centered
-        }
+        info = self.attention_info
+        info.looking_at_screen = is_looking_at_screen
+        info.blink_rate = blink_rate
+        info.total_blinks = self.blink_counter
+        info.eye_aspect_ratio = avg_ear
+        info.facing_screen = facing_screen
+        info.head_pose = pose
+        return info
     
     def play_alert_sound(self):
         """Play alert sound in separate thread"""
+        if not self.sound_enabled:
+            return
+        
         def play():
             try:
-                winsound.Beep(1000, 300)  # 1000 Hz for 300ms
+                if winsound is not None:
+                    winsound.Beep(1000, 300)  # 1000 Hz for 300ms
+                else:
+                    sys.stdout.write('\a')
+                    sys.stdout.flush()
             except:
                 pass
         
@@ -222,25 +373,25 @@ class SmartDeskMonitor:
     def draw_alerts(self, frame, posture_info, attention_info):
         """Draw alerts and information on frame"""
         h, w = frame.shape[:2]
-        current_time = time.time()
+        current_time = self.clock()
         
         # Alert messages
         alerts = []
         
         # Posture alerts
-        if posture_info['slouching']:
+        if posture_info.slouching:
             alerts.append(("⚠️ SLOUCHING DETECTED! Sit up straight", (0, 0, 255)))
             if current_time - self.last_posture_alert > self.alert_cooldown:
                 self.play_alert_sound()
                 self.last_posture_alert = current_time
         
-        if posture_info['too_close']:
+        if posture_info.too_close:
             alerts.append(("⚠️ Too close to screen! Move back", (0, 165, 255)))
             if current_time - self.last_distance_alert > self.alert_cooldown:
                 self.last_distance_alert = current_time
         
         # Attention alerts
-        if not attention_info['looking_at_screen']:
+        if not attention_info.looking_at_screen:
             if self.looking_away_start is None:
                 self.looking_away_start = current_time
             elif current_time - self.looking_away_start > self.away_time_threshold:
@@ -260,23 +411,45 @@ class SmartDeskMonitor:
             y_offset += 40
         
         # Blink rate warning
-        if attention_info['blink_rate'] < 10:  # Less than 10 blinks per minute
+        if attention_info.blink_rate < 10:  # Less than 10 blinks per minute
             cv2.putText(frame, "😔 Low blink rate - Risk of eye strain!", 
                        (20, y_offset), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 140, 255), 2)
             y_offset += 30
         
+        # Head angles
+        pose = attention_info.head_pose
+        if pose is not None:
+            color = (0, 255, 0) if attention_info.facing_screen else (0, 255, 255)
+            cv2.putText(frame, f"Head: yaw {pose.yaw:+.0f}  pitch {pose.pitch:+.0f}  roll {pose.roll:+.0f}",
+                       (20, h - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+        
+        return frame
+    
+    def draw_pose(self, frame, pose_points):
+        """Draw the pose skeleton: red connections, green joints"""
+        h, w = frame.shape[:2]
+        x, y, visibility = pose_points.T
+        # Like MediaPipe's drawing utils, skip joints that are hidden or outside the frame
+        shown = (visibility >= VISIBILITY_THRESHOLD) & (x >= 0) & (x <= 1) & (y >= 0) & (y <= 1)
+        pixels = np.minimum((pose_points[:, :2] * (w, h)).astype(int), (w - 1, h - 1)).tolist()
+        for a, b in self.mp_pose.POSE_CONNECTIONS:
+            if shown[a] and shown[b]:
+                cv2.line(frame, pixels[a], pixels[b], (0, 0, 255), 2)
+        for i in np.flatnonzero(shown):
+            cv2.circle(frame, pixels[i], 2, (0, 255, 0), 2)
         return frame
     
     def draw_stats_panel(self, frame):
         """Draw statistics panel"""
         h, w = frame.shape[:2]
-        session_duration = time.time() - self.session_start
+        session_duration = self.clock() - self.session_start
         
         # Create semi-transparent panel
         panel_height = 180
-        overlay = frame.copy()
+        overlay = self.buffers.get('overlay', frame.shape)
+        np.copyto(overlay, frame)
         cv2.rectangle(overlay, (w - 350, 10), (w - 10, panel_height), (0, 0, 0), -1)
-        frame = cv2.addWeighted(overlay, 0.7, frame, 0.3, 0)
+        frame = cv2.addWeighted(overlay, 0.7, frame, 0.3, 0, dst=frame)
         
         # Stats text
         stats = [
@@ -298,11 +471,11 @@ class SmartDeskMonitor:
     
     def update_statistics(self, posture_info, attention_info):
         """Update session statistics"""
-        current_time = time.time()
+        current_time = self.clock()
         time_delta = current_time - self.last_posture_check
         
-        self.is_slouching = posture_info['slouching']
-        self.is_looking_away = not attention_info['looking_at_screen']
+        self.is_slouching = posture_info.slouching
+        self.is_looking_away = not attention_info.looking_at_screen
         
         if self.is_slouching:
             self.total_slouch_time += time_delta
@@ -312,156 +485,320 @@ class SmartDeskMonitor:
         else:
             self.total_focused_time += time_delta
         
+        # The primary user's own session
+        person = self.person
+        if person is not None:
+            person.primary_time += time_delta
+            if self.is_looking_away:
+                person.away_time += time_delta
+            else:
+                person.focused_time += time_delta
+            if posture_info.too_close:
+                person.too_close_time += time_delta
+        
         self.last_posture_check = current_time
     
-    def run(self):
-        """Main monitoring loop"""
-        cap = cv2.VideoCapture(0)
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+    def process_frame(self, frame):
+        """Run pose/face analysis, statistics and overlays on one raw frame"""
+        # Flip frame for mirror effect; RGB only on frames that run detection. Landmarks
+        # are normalised, so MediaPipe can work on a downscaled copy
+        detect = self.frame_index % self.detect_every == 0
+        frame, rgb_frame = self.preprocessor.prepare(frame, self.detection_scale, convert=detect)
+        
+        # Process pose (every detect_every frames, reusing the last results in between)
+        if detect:
+            self.last_results = self.detect_landmarks(rgb_frame)
+        self.frame_index += 1
+        pose, faces = self.last_results
+        
+        posture_info = None
+        attention_info = None
+        
+        # Analyze posture
+        if pose is not None:
+            posture_info = self.check_posture(pose, frame.shape)
+            self.draw_pose(frame, pose)
+        
+        # Analyze attention (primary user only)
+        face = self.track_faces(faces, frame.shape)
+        if face is not None:
+            attention_info = self.check_attention(face, frame.shape)
+        self.face_present = posture_info is not None or attention_info is not None
+        
+        # Update statistics and draw alerts; without a full detection the time counts as
+        # away, exactly as it does in idle mode
+        if posture_info and attention_info:
+            self.update_statistics(posture_info, attention_info)
+            frame = self.draw_alerts(frame, posture_info, attention_info)
+        else:
+            self.record_away_time()
+        
+        # Draw stats panel
+        frame = self.draw_stats_panel(frame)
+        
+        # Show calibration status
+        if not self.calibrated:
+            cv2.putText(frame, "Calibrating... Please face the camera", 
+                       (20, frame.shape[0] - 20), cv2.FONT_HERSHEY_SIMPLEX, 
+                       0.7, (0, 255, 255), 2)
+        
+        return frame
+    
+    def record_away_time(self):
+        """Nobody in view (idle mode, or no face detected): the time since the last update counts as away"""
+        current_time = self.clock()
+        time_delta = current_time - self.last_posture_check
+        self.total_away_time += time_delta
+        # The primary user's own session, as in update_statistics
+        if self.person is not None:
+            self.person.primary_time += time_delta
+            self.person.away_time += time_delta
+        self.last_posture_check = current_time
+        self.is_looking_away = True
+    
+    def resume_from_idle(self):
+        """Back from idle mode: detect on the very next frame and start the away timer afresh"""
+        self.frame_index = 0
+        self.looking_away_start = None
+        self.face_present = True
+    
+    def handle_key(self, key):
+        """Handle a key press; returns False when the user wants to quit"""
+        if key == ord('q'):
+            return False
+        elif key == ord('r'):
+            self.reset_statistics()
+            print("📊 Statistics reset!")
+        elif key == ord('s'):
+            self.save_session_report()
+        return True
+    
+    def record_blink(self, current_time):
+        """Add a blink to the rate window and to the session's blinks-per-minute history"""
+        self.blink_times.append(current_time)
+        minute = max(int((current_time - self.session_start) // 60), 0)
+        if minute >= len(self.blinks_per_minute):
+            self.blinks_per_minute.extend([0] * (minute + 1 - len(self.blinks_per_minute)))
+        self.blinks_per_minute[minute] += 1
+    
+    def get_statistics(self):
+        """Session statistics as a plain dict (used by replay regression checks)"""
+        return {
+            'session_start': self.session_start,
+            'total_focused_time': self.total_focused_time,
+            'total_away_time': self.total_away_time,
+            'total_slouch_time': self.total_slouch_time,
+            'blink_counter': self.blink_counter,
+            'blinks_per_minute': list(self.blinks_per_minute),
+            'reference_shoulder_distance': float(self.reference_shoulder_distance) if self.reference_shoulder_distance else None,
+            'last_posture_alert': self.last_posture_alert,
+            'last_distance_alert': self.last_distance_alert,
+            'last_attention_alert': self.last_attention_alert,
+            'people': [person.as_dict() for person in self.tracker.sessions()],
+        }
+    
+    def close(self):
+        """Release MediaPipe resources"""
+        self.pose.close()
+        self.face_mesh.close()
+    
+    def run(self, source=None, recorder=None, headless=False, memory_monitor=None, config_watcher=None):
+        """Main monitoring loop
+        
+        headless runs without a window (service mode, stop with Ctrl+C);
+        memory_monitor, if given, enforces its memory budget every frame;
+        config_watcher, if given, hot-reloads settings between frames.
+        """
+        capture = self.config.capture
+        cap = source if source is not None else CameraSource(
+            0, capture.width, capture.height, capture.fps, capture.buffer_size)
         
         print("🚀 Smart Desk Monitor Started!")
+        print(f"📹 Source: {cap.describe()}")
+        print(f"⚙️  {describe_opencv()}")
+        if recorder:
+            print(f"⏺️  Recording session to: {recorder.path}")
         print("📹 Calibrating... Please sit in a good posture and look at the camera")
         print("Press 'q' to quit, 'r' to reset statistics, 's' to save session report")
         
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            # Flip frame for mirror effect
-            frame = cv2.flip(frame, 1)
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            
-            # Process pose
-            pose_results = self.pose.process(rgb_frame)
-            face_results = self.face_mesh.process(rgb_frame)
-            
-            posture_info = None
-            attention_info = None
-            
-            # Analyze posture
-            if pose_results.pose_landmarks:
-                posture_info = self.check_posture(pose_results.pose_landmarks, frame.shape)
+        # Idle mode reconfigures a live camera; files and synthetic frames are read at their
+        # own pace, and recordings would get low-resolution frames a replay can't reproduce
+        presence = None
+        if self.config.presence.enabled and isinstance(cap, CameraSource) and not recorder:
+            presence = self.presence = PresenceController(self.config.presence, self.config.detection,
+                                                          self.clock)
+        
+        if memory_monitor:
+            memory_monitor.start()
+        
+        try:
+            while cap.isOpened():
+                ret, frame = cap.read()
+                if not ret:
+                    break
                 
-                # Draw pose landmarks
-                self.mp_drawing.draw_landmarks(
-                    frame, 
-                    pose_results.pose_landmarks,
-                    self.mp_pose.POSE_CONNECTIONS,
-                    self.mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2),
-                    self.mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=2)
-                )
-            
-            # Analyze attention
-            if face_results.multi_face_landmarks:
-                attention_info = self.check_attention(face_results.multi_face_landmarks[0], frame.shape)
-            
-            # Update statistics and draw alerts
-            if posture_info and attention_info:
-                self.update_statistics(posture_info, attention_info)
-                frame = self.draw_alerts(frame, posture_info, attention_info)
-            
-            # Draw stats panel
-            frame = self.draw_stats_panel(frame)
-            
-            # Show calibration status
-            if not self.calibrated:
-                cv2.putText(frame, "Calibrating... Please face the camera", 
-                           (20, frame.shape[0] - 20), cv2.FONT_HERSHEY_SIMPLEX, 
-                           0.7, (0, 255, 255), 2)
-            
-            # Display frame
-            cv2.imshow('Smart Desk Monitor - Posture & Focus Tracker', frame)
-            
-            # Handle key presses
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord('q'):
-                break
-            elif key == ord('r'):
-                self.reset_statistics()
-                print("📊 Statistics reset!")
-            elif key == ord('s'):
-                self.save_session_report()
+                # Drive the engine from the capture timestamp so a replay sees the same times
+                if hasattr(self.clock, 'advance'):
+                    self.clock.advance(cap.last_timestamp)
+                if recorder:
+                    frame = recorder.encode(frame)
+                
+                # Nobody at the desk: a cheap presence check replaces full monitoring
+                redraw = True
+                if presence and presence.idle:
+                    if presence.detect(frame):
+                        presence.wake(cap, self.config.capture)
+                        self.resume_from_idle()
+                    else:
+                        self.record_away_time()
+                    frame = presence.idle_frame()
+                    redraw = presence.should_redraw()
+                else:
+                    frame = self.process_frame(frame)
+                    if presence:
+                        presence.observe(self.face_present, cap)
+                
+                if config_watcher:
+                    self.reload_config(config_watcher, cap)
+                
+                if memory_monitor:
+                    try:
+                        memory_monitor.check()
+                    except MemoryBudgetExceeded as e:
+                        print(f"🧠 Stopping: {e}")
+                        break
+                
+                if headless:
+                    if recorder:
+                        recorder.write(cap.last_timestamp)
+                    continue
+                
+                # Display frame (only now and then while idle)
+                if redraw:
+                    cv2.imshow('Smart Desk Monitor - Posture & Focus Tracker', frame)
+                
+                # Handle key presses
+                key = cv2.waitKey(1) & 0xFF
+                if recorder:
+                    recorder.write(cap.last_timestamp, key if key in REPLAYED_KEYS else NO_KEY)
+                if not self.handle_key(key):
+                    break
+        
+        except KeyboardInterrupt:
+            print("\n⏹️  Interrupted")
         
         # Cleanup
+        print(f"📹 Capture: {cap.stats.summary()}")
         cap.release()
-        cv2.destroyAllWindows()
-        self.pose.close()
-        self.face_mesh.close()
+        if not headless:
+            cv2.destroyAllWindows()
+        self.close()
+        if recorder:
+            recorder.close()
+            print(f"⏺️  Recorded {recorder.frames} frames to: {recorder.path}")
+        if self.cache is not None:
+            print(f"🗃️  Detection cache: {self.cache.summary()}")
+        if presence:
+            print(f"🔋 Presence: {presence.report()}")
+        if memory_monitor:
+            print(f"🧠 Memory: {memory_monitor.report()}")
+            memory_monitor.stop()
         
         # Final report
         self.save_session_report()
+        self.report_writer.close()
+    
+    def reload_config(self, config_watcher, cap):
+        """Apply a changed config file between frames"""
+        config = config_watcher.poll()
+        if config is None:
+            return
+        capture_changed = config.capture != self.config.capture
+        self.apply_config(config)
+        if self.presence:
+            self.presence.configure(config.presence, config.detection)
+        if capture_changed and hasattr(cap, 'reconfigure') and not (self.presence and self.presence.idle):
+            cap.reconfigure(config.capture.width, config.capture.height,
+                            config.capture.fps, config.capture.buffer_size)
+            # Shoulder width baseline is in pixels of the old capture resolution
+            self.calibrated = False
+            self.reference_shoulder_distance = None
+            self.tracker.reset_calibration()
+            print(f"📹 Capture: {cap.describe()}")
+        print("🔧 Config reloaded")
     
     def reset_statistics(self):
         """Reset all statistics"""
-        self.session_start = time.time()
+        self.session_start = self.clock()
         self.total_slouch_time = 0
         self.total_away_time = 0
         self.total_focused_time = 0
         self.blink_counter = 0
         self.blink_times.clear()
+        self.blinks_per_minute = []
+        self.tracker.reset_statistics()
+    
+    def report_snapshot(self):
+        """Copy of the session statistics for the report writer, taken between frames"""
+        stats = self.get_statistics()
+        stats['monitor'] = 'full'
+        stats['session_duration'] = self.clock() - self.session_start
+        stats['date'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if self.presence:
+            stats['presence'] = self.presence.summary()
+        return stats
     
     def save_session_report(self):
-        """Save session report to file"""
-        session_duration = time.time() - self.session_start
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        
-        report = f"""
-╔══════════════════════════════════════════════════════════╗
-║        SMART DESK MONITOR - SESSION REPORT              ║
-╚══════════════════════════════════════════════════════════╝
-
-📅 Date: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-
-⏱️  SESSION DURATION
-   Total Time: {int(session_duration // 3600)}h {int((session_duration % 3600) // 60)}m {int(session_duration % 60)}s
-
-👁️  ATTENTION & FOCUS
-   Focused Time: {int(self.total_focused_time // 60)}m {int(self.total_focused_time % 60)}s
-   Looking Away: {int(self.total_away_time // 60)}m {int(self.total_away_time % 60)}s
-   Focus Rate: {(self.total_focused_time / session_duration * 100):.1f}%
-   
-👀 BLINK STATISTICS
-   Total Blinks: {self.blink_counter}
-   Avg Blink Rate: {(self.blink_counter / (session_duration / 60)):.1f} blinks/min
-   Recommended: 15-20 blinks/min
-
-🪑 POSTURE ANALYSIS
-   Good Posture: {int((session_duration - self.total_slouch_time) // 60)}m
-   Slouching Time: {int(self.total_slouch_time // 60)}m {int(self.total_slouch_time % 60)}s
-   Posture Score: {((session_duration - self.total_slouch_time) / session_duration * 100):.1f}%
-
-💡 RECOMMENDATIONS
-"""
-        
-        # Add recommendations
-        if self.total_slouch_time / session_duration > 0.3:
-            report += "   ⚠️  You slouched frequently. Consider ergonomic chair adjustments.\n"
-        
-        if self.blink_counter / (session_duration / 60) < 12:
-            report += "   ⚠️  Low blink rate detected. Take breaks and use the 20-20-20 rule.\n"
-        
-        if self.total_away_time / session_duration > 0.4:
-            report += "   ⚠️  Frequently distracted. Try time-blocking or focus techniques.\n"
-        
-        if self.total_focused_time / session_duration > 0.8:
-            report += "   ✅ Excellent focus! Keep up the good work.\n"
-        
-        if ((session_duration - self.total_slouch_time) / session_duration) > 0.8:
-            report += "   ✅ Great posture maintained throughout the session!\n"
-        
-        report += "\n" + "="*60 + "\n"
-        
-        # Save to file
-        filename = f"session_report_{timestamp}.txt"
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(report)
-        
-        print(f"\n📄 Session report saved to: {filename}")
-        print(report)
+        """Save the session report; rendering and writing happen in the background"""
+        return self.report_writer.submit(self.report_snapshot())
 
 
 if __name__ == "__main__":
-    monitor = SmartDeskMonitor()
-    monitor.run()
+    parser = argparse.ArgumentParser(description="Smart Desk Monitor - Posture & Focus Tracker")
+    parser.add_argument('--source', default=None,
+                        help="Camera index, video file, image directory or 'synthetic[:WxH]' (overrides capture.source)")
+    parser.add_argument('--record', metavar='PATH',
+                        help="Record the raw session (frames, timestamps, keys) to PATH")
+    parser.add_argument('--replay', metavar='PATH',
+                        help="Replay a recorded session at full speed and print its statistics")
+    parser.add_argument('--expect', metavar='JSON',
+                        help="With --replay: compare statistics against a stored JSON file")
+    parser.add_argument('--service', action='store_true',
+                        help="Long-running mode: no window, memory tracked and kept within budget")
+    parser.add_argument('--memory-budget', type=float, default=512, metavar='MB',
+                        help="With --service: stop if resident memory exceeds this many MB (default 512)")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="With --service: trace Python allocations from the start instead of only after RSS grows")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    
+    try:
+        config_watcher = ConfigWatcher(args.config, args.overrides)
+    except ConfigError as e:
+        parser.error(str(e))
+    config = config_watcher.config
+    
+    if args.replay:
+        stats = replay(args.replay, lambda clock: SmartDeskMonitor(clock=clock, config=config))
+        if args.expect:
+            mismatches = check_statistics(stats, args.expect)
+            for mismatch in mismatches:
+                print(f"❌ {mismatch}")
+            print("✅ Statistics match" if not mismatches else f"❌ {len(mismatches)} mismatches")
+            sys.exit(1 if mismatches else 0)
+        print(json.dumps(stats, indent=2))
+        sys.exit(0)
+    
+    capture = config.capture
+    source = open_source(args.source or capture.source, capture.width, capture.height,
+                         capture.fps, capture.buffer_size)
+    if args.record:
+        clock = FrameClock(source.start_time)
+        monitor = SmartDeskMonitor(clock=clock, config=config)
+        recorder = SessionRecorder(args.record, clock())
+    else:
+        monitor = SmartDeskMonitor(config=config)
+        recorder = None
+    memory_monitor = MemoryMonitor(budget_mb=args.memory_budget, trace=args.trace_memory) if args.service else None
+    monitor.run(source, recorder, headless=args.service, memory_monitor=memory_monitor,
+                config_watcher=config_watcher if args.config else None)
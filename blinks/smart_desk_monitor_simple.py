@@ -7,52 +7,148 @@ Compatible with Python 3.13+
 import cv2
 import numpy as np
 import time
-import winsound
+try:
+    import winsound
+except ImportError:
+    # Not on Windows: alerts fall back to the terminal bell
+    winsound = None
 from datetime import datetime
 from collections import deque
 import threading
+import argparse
+import json
+import sys
 
-class SimplifiedDeskMonitor:
+from capture import CameraSource, open_source
+from session_recording import FrameClock, SessionRecorder, replay, check_statistics, REPLAYED_KEYS, NO_KEY
+from memory_guard import BufferPool, MemoryMonitor, MemoryBudgetExceeded
+from config import MonitorConfig, ConfigWatcher, ConfigError, add_config_arguments
+from detection_cache import cache_from_config
+from face_tracker import FaceTracker
+from preprocess import Preprocessor, configure_opencv, describe_opencv, eye_region
+from reports import ReportWriter
+from presence import PresenceController
+
+
+class PositionInfo:
+    """Face position result, reused every frame instead of allocating a dict"""
+    __slots__ = ('face_detected', 'too_close', 'too_far', 'centered', 'face_size', 'face_rect')
+    
+    def __init__(self):
+        self.clear()
+    
+    def clear(self):
+        self.face_detected = False
+        self.too_close = False
+        self.too_far = False
+        self.centered = False
+        self.face_size = 0
+        self.face_rect = None
+
+
+class EyeInfo:
+    """Eye state result, reused every frame instead of allocating a dict"""
+    __slots__ = ('eyes_detected', 'looking_at_screen', 'blink_detected', 'blink_rate')
+    
     def __init__(self):
+        self.clear()
+    
+    def clear(self):
+        self.eyes_detected = 0
+        self.looking_at_screen = False
+        self.blink_detected = False
+        self.blink_rate = 0
+
+
+class SimplifiedDeskMonitor:
+    def __init__(self, clock=None, config=None):
+        # Injected clock (defaults to wall time) so sessions can be replayed
+        self.clock = clock or time.time
+        self.sound_enabled = True
+        
+        # Per-frame buffers and result objects, reused to keep memory flat
+        self.buffers = BufferPool()
+        self.position_info = PositionInfo()
+        self.eye_info = EyeInfo()
+        
         # Load pre-trained models
         self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
         self.eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
         
-        # Monitoring parameters
+        # Every face in view is tracked; the primary user's session drives alerts
+        self.tracker = FaceTracker()
+        self.person = None
+        
+        # Monitoring parameters and performance knobs (see config.py)
         self.baseline_face_size = None
-        self.distance_threshold_near = 1.3  # Face size ratio (too close)
-        self.distance_threshold_far = 0.7   # Face size ratio (too far)
-        self.away_time_threshold = 5  # Seconds looking away before alert
+        self.config = None
+        self.cache = None
+        self.report_writer = ReportWriter()
+        self.presence = None
+        self.face_present = False
+        self.apply_config(config or MonitorConfig())
+        self.frame_index = 0
+        self.last_detection = (None, None, None)
         
         # Tracking variables
         self.looking_away_start = None
         self.blink_counter = 0
-        self.blink_times = deque(maxlen=100)
-        self.last_blink_time = time.time()
+        self.blink_times = deque(maxlen=100)      # Recent blinks, for the live blink rate
+        self.blinks_per_minute = []               # Whole-session history, for reports
+        self.last_blink_time = self.clock()
         self.eye_closed_frames = 0
         
         # Session statistics
-        self.session_start = time.time()
+        self.session_start = self.clock()
         self.total_away_time = 0
         self.total_focused_time = 0
         self.total_too_close_time = 0
         self.total_good_posture_time = 0
-        self.last_check = time.time()
+        self.last_check = self.clock()
         
         # Alert cooldowns
         self.last_distance_alert = 0
         self.last_attention_alert = 0
-        self.alert_cooldown = 5  # Seconds between alerts
         
         # State tracking
         self.is_looking_away = False
         self.calibrated = False
         
+    def apply_config(self, config):
+        """Apply thresholds and performance knobs; safe to call between frames"""
+        previous = self.config
+        self.config = config
+        self.distance_threshold_near = config.simple.distance_threshold_near
+        self.distance_threshold_far = config.simple.distance_threshold_far
+        self.min_calibration_face_size = config.simple.min_calibration_face_size
+        self.away_time_threshold = config.alerts.away_time_threshold
+        self.alert_cooldown = config.alerts.alert_cooldown
+        self.detection = config.detection
+        self.detection_scale = config.performance.detection_scale
+        self.detect_every = config.performance.detect_every
+        configure_opencv(config.performance)
+        self.preprocessor = Preprocessor(self.buffers, cv2.COLOR_BGR2GRAY, config.performance.opencl)
+        self.tracker.configure(config.tracking)
+        self.report_writer.configure(config.reports)
+        
+        # Cached detections are only valid for the settings that produced them
+        self.cache = cache_from_config(config.cache, self.cache)
+        if self.cache and previous and (previous.detection != config.detection or
+                                        previous.performance.detection_scale != self.detection_scale):
+            self.cache.clear()
+    
     def play_alert_sound(self):
         """Play alert sound in separate thread"""
+        if not self.sound_enabled:
+            return
+        
         def play():
             try:
-                winsound.Beep(1000, 300)  # 1000 Hz for 300ms
+                if winsound is not None:
+                    winsound.Beep(1000, 300)  # 1000 Hz for 300ms
+                else:
+                    sys.stdout.write('\a')
+                    sys.stdout.flush()
             except:
                 pass
         
@@ -60,37 +156,72 @@ class SimplifiedDeskMonitor:
         thread.daemon = True
         thread.start()
     
-    def detect_face_and_eyes(self, frame):
-        """Detect face and eyes using Haar Cascades"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        
-        # Detect faces
-        faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
-        
-        if len(faces) == 0:
+    def detect_faces(self, gray):
+        """Detect every face using Haar Cascades, optionally on a downscaled copy"""
+        if self.detection_scale < 1.0:
+            small = cv2.resize(gray, None, fx=self.detection_scale, fy=self.detection_scale,
+                               interpolation=cv2.INTER_AREA)
+            faces = self.face_cascade.detectMultiScale(
+                small, self.detection.face_scale_factor, self.detection.face_min_neighbors)
+            return (np.asarray(faces) / self.detection_scale).astype(int)
+        return self.face_cascade.detectMultiScale(
+            gray, self.detection.face_scale_factor, self.detection.face_min_neighbors)
+    
+    def detect_face_and_eyes(self, gray):
+        """Detect faces, follow them with the tracker, and find the primary user's eyes"""
+        # Answer from the cache when this frame (or a near-identical one) was seen before;
+        # eyes are cached per face as they're looked up
+        cached = None
+        if self.cache is not None:
+            key = self.cache.key(gray)
+            cached = self.cache.get(key)
+            if cached is None:
+                cached = (self.detect_faces(gray), {})
+                self.cache.put(key, cached)
+        faces, eyes_by_face = cached if cached is not None else (self.detect_faces(gray), {})
+        
+        track = self.tracker.update(faces, self.clock())
+        self.follow_person(track)
+        if track is None or not track.visible:
             return None, None, None
         
-        # Get the largest face (closest to camera)
-        face = max(faces, key=lambda x: x[2] * x[3])
-        x, y, w, h = face
-        
-        # Detect eyes in face region
-        roi_gray = gray[y:y+h, x:x+w]
-        roi_color = frame[y:y+h, x:x+w]
-        eyes = self.eye_cascade.detectMultiScale(roi_gray, 1.1, 5)
-        
+        # Detect eyes in the primary user's face region only, at the detection scale
+        face = track.rect
+        roi_gray, roi_scale = eye_region(gray, face, self.detection_scale)
+        eyes = eyes_by_face.get(track.index)
+        if eyes is None:
+            eyes = self.eye_cascade.detectMultiScale(
+                roi_gray, self.detection.eye_scale_factor, self.detection.eye_min_neighbors)
+            if roi_scale < 1.0:
+                eyes = (np.asarray(eyes) / roi_scale).astype(int)
+            eyes_by_face[track.index] = eyes
+        
+        self.calibrate_people()
         return face, eyes, roi_gray
     
+    def follow_person(self, track):
+        """Switch calibration and blink state when a different person becomes the primary user"""
+        person = track.session if track is not None else None
+        if person is None or person is self.person:
+            return
+        self.person = person
+        self.baseline_face_size = person.baseline
+        self.calibrated = person.baseline is not None
+        self.eye_closed_frames = 0
+    
+    def calibrate_people(self):
+        """Calibrate everyone else in view on their first good frame"""
+        for track in self.tracker.tracks:
+            if (track.visible and track.session is not self.person and track.session.baseline is None
+                    and track.rect[2] * track.rect[3] > self.min_calibration_face_size):
+                track.session.baseline = int(track.rect[2] * track.rect[3])
+    
     def analyze_position(self, face, frame_shape):
         """Analyze face position and distance"""
+        info = self.position_info
+        info.clear()
         if face is None:
-            return {
-                'face_detected': False,
-                'too_close': False,
-                'too_far': False,
-                'centered': False,
-                'face_size': 0
-            }
+            return info
         
         x, y, w, h = face
         frame_h, frame_w = frame_shape[:2]
@@ -99,9 +230,11 @@ class SimplifiedDeskMonitor:
         face_size = w * h
         
         # Calibration
-        if not self.calibrated and face_size > 5000:
+        if not self.calibrated and face_size > self.min_calibration_face_size:
             self.baseline_face_size = face_size
             self.calibrated = True
+            if self.person is not None:
+                self.person.baseline = face_size
         
         # Check distance
         too_close = False
@@ -115,28 +248,25 @@ class SimplifiedDeskMonitor:
         face_center_x = x + w // 2
         centered = (frame_w * 0.3 < face_center_x < frame_w * 0.7)
         
-        return {
-            'face_detected': True,
-            'too_close': too_close,
-            'too_far': too_far,
-            'centered': centered,
-            'face_size': face_size,
-            'face_rect': face
-        }
+        info.face_detected = True
+        info.too_close = too_close
+        info.too_far = too_far
+        info.centered = centered
+        info.face_size = face_size
+        info.face_rect = face
+        return info
     
     def analyze_eyes(self, eyes, face):
         """Analyze eye state for blinks and attention"""
+        info = self.eye_info
+        info.clear()
         if face is None:
-            return {
-                'eyes_detected': 0,
-                'looking_at_screen': False,
-                'blink_detected': False
-            }
+            return info
         
         num_eyes = len(eyes)
         
         # Blink detection (eyes disappear)
-        current_time = time.time()
+        current_time = self.clock()
         blink_detected = False
         
         if num_eyes < 2:
@@ -146,45 +276,45 @@ class SimplifiedDeskMonitor:
                 # Valid blink (2-8 frames)
                 if current_time - self.last_blink_time > 0.2:
                     self.blink_counter += 1
-                    self.blink_times.append(current_time)
+                    self.record_blink(current_time)
                     self.last_blink_time = current_time
                     blink_detected = True
+                    if self.person is not None:
+                        self.person.blink_counter += 1
             self.eye_closed_frames = 0
         
         # Calculate blink rate (blinks per minute)
-        recent_blinks = [t for t in self.blink_times if current_time - t < 60]
-        blink_rate = len(recent_blinks)
+        blink_rate = sum(1 for t in self.blink_times if current_time - t < 60)
         
         # Looking at screen if eyes are detected
         looking_at_screen = num_eyes >= 1
         
-        return {
-            'eyes_detected': num_eyes,
-            'looking_at_screen': looking_at_screen,
-            'blink_detected': blink_detected,
-            'blink_rate': blink_rate
-        }
+        info.eyes_detected = num_eyes
+        info.looking_at_screen = looking_at_screen
+        info.blink_detected = blink_detected
+        info.blink_rate = blink_rate
+        return info
     
     def draw_alerts(self, frame, position_info, eye_info):
         """Draw alerts and information on frame"""
         h, w = frame.shape[:2]
-        current_time = time.time()
+        current_time = self.clock()
         
         alerts = []
         
         # Position alerts
-        if position_info and position_info['too_close']:
+        if position_info and position_info.too_close:
             alerts.append(("⚠️ TOO CLOSE! Move back from screen", (0, 165, 255)))
             if current_time - self.last_distance_alert > self.alert_cooldown:
                 self.play_alert_sound()
                 self.last_distance_alert = current_time
         
-        if position_info and position_info['too_far']:
+        if position_info and position_info.too_far:
             alerts.append(("⚠️ Too far from screen", (0, 255, 255)))
         
         # Attention alerts
         if eye_info and position_info:
-            if not eye_info['looking_at_screen'] or not position_info['face_detected']:
+            if not eye_info.looking_at_screen or not position_info.face_detected:
                 if self.looking_away_start is None:
                     self.looking_away_start = current_time
                 elif current_time - self.looking_away_start > self.away_time_threshold:
@@ -196,7 +326,7 @@ class SimplifiedDeskMonitor:
                 self.looking_away_start = None
         
         # Blink rate warning
-        if eye_info and eye_info.get('blink_rate', 0) < 10 and eye_info.get('blink_rate', 0) > 0:
+        if eye_info and 0 < eye_info.blink_rate < 10:
             alerts.append(("😔 Low blink rate - Blink more often!", (0, 140, 255)))
         
         # Draw alerts
@@ -211,16 +341,24 @@ class SimplifiedDeskMonitor:
     
     def draw_visualizations(self, frame, face, eyes, position_info):
         """Draw face and eye detection boxes"""
+        # Other people in view, labelled with their tracking ID
+        for track in self.tracker.tracks:
+            if track.visible and track is not self.tracker.primary:
+                x, y, w, h = track.rect
+                cv2.rectangle(frame, (x, y), (x+w, y+h), (128, 128, 128), 1)
+                cv2.putText(frame, f"#{track.session.person_id}", (x, y - 5),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (128, 128, 128), 1)
+        
         if face is not None:
             x, y, w, h = face
             
             # Face box color based on distance
             color = (0, 255, 0)  # Green = good
-            if position_info['too_close']:
+            if position_info.too_close:
                 color = (0, 165, 255)  # Orange = too close
-            elif position_info['too_far']:
+            elif position_info.too_far:
                 color = (0, 255, 255)  # Yellow = too far
-            elif not position_info['centered']:
+            elif not position_info.centered:
                 color = (255, 255, 0)  # Cyan = not centered
             
             cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
@@ -235,13 +373,14 @@ class SimplifiedDeskMonitor:
     def draw_stats_panel(self, frame, eye_info):
         """Draw statistics panel"""
         h, w = frame.shape[:2]
-        session_duration = time.time() - self.session_start
+        session_duration = self.clock() - self.session_start
         
         # Create semi-transparent panel
         panel_height = 200
-        overlay = frame.copy()
+        overlay = self.buffers.get('overlay', frame.shape)
+        np.copyto(overlay, frame)
         cv2.rectangle(overlay, (w - 350, 10), (w - 10, panel_height), (0, 0, 0), -1)
-        frame = cv2.addWeighted(overlay, 0.7, frame, 0.3, 0)
+        frame = cv2.addWeighted(overlay, 0.7, frame, 0.3, 0, dst=frame)
         
         # Calculate focus percentage
         focus_percentage = 0
@@ -254,7 +393,7 @@ class SimplifiedDeskMonitor:
             f"Time: {int(session_duration // 60)}m {int(session_duration % 60)}s",
             f"",
             f"👁️  Blinks: {self.blink_counter}",
-            f"Rate: {eye_info.get('blink_rate', 0)}/min",
+            f"Rate: {eye_info.blink_rate}/min",
             f"",
             f"🎯 Focused: {int(self.total_focused_time // 60)}m",
             f"😴 Away: {int(self.total_away_time // 60)}m",
@@ -274,99 +413,159 @@ class SimplifiedDeskMonitor:
         if not position_info or not eye_info:
             return
             
-        current_time = time.time()
+        current_time = self.clock()
         time_delta = current_time - self.last_check
         
-        face_detected = position_info.get('face_detected', False)
-        looking = eye_info.get('looking_at_screen', False)
+        face_detected = position_info.face_detected
+        looking = eye_info.looking_at_screen
+        person = self.person
         
         if face_detected and looking:
             self.total_focused_time += time_delta
-            if not position_info.get('too_close', False):
+            if not position_info.too_close:
                 self.total_good_posture_time += time_delta
             else:
                 self.total_too_close_time += time_delta
         else:
             self.total_away_time += time_delta
         
+        # The primary user's own session
+        if person is not None:
+            person.primary_time += time_delta
+            if face_detected and looking:
+                person.focused_time += time_delta
+                if position_info.too_close:
+                    person.too_close_time += time_delta
+            else:
+                person.away_time += time_delta
+        
         self.is_looking_away = not (face_detected and looking)
         self.last_check = current_time
     
+    def report_snapshot(self):
+        """Copy of the session statistics for the report writer, taken between frames"""
+        stats = self.get_statistics()
+        stats['monitor'] = 'simple'
+        stats['session_duration'] = self.clock() - self.session_start
+        stats['date'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if self.presence:
+            stats['presence'] = self.presence.summary()
+        return stats
+    
     def save_session_report(self):
-        """Save session report to file"""
-        session_duration = time.time() - self.session_start
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        
-        focus_rate = (self.total_focused_time / session_duration * 100) if session_duration > 0 else 0
-        posture_score = (self.total_good_posture_time / session_duration * 100) if session_duration > 0 else 0
-        avg_blink_rate = (self.blink_counter / (session_duration / 60)) if session_duration > 60 else 0
-        
-        report = f"""
-╔══════════════════════════════════════════════════════════╗
-║     SMART DESK MONITOR - SESSION REPORT                 ║
-╚══════════════════════════════════════════════════════════╝
-
-📅 Date: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-
-⏱️  SESSION DURATION
-   Total Time: {int(session_duration // 3600)}h {int((session_duration % 3600) // 60)}m {int(session_duration % 60)}s
-
-👁️  ATTENTION & FOCUS
-   Focused Time: {int(self.total_focused_time // 60)}m {int(self.total_focused_time % 60)}s
-   Looking Away: {int(self.total_away_time // 60)}m {int(self.total_away_time % 60)}s
-   Focus Rate: {focus_rate:.1f}%
-   
-👀 BLINK STATISTICS
-   Total Blinks: {self.blink_counter}
-   Avg Blink Rate: {avg_blink_rate:.1f} blinks/min
-   Recommended: 15-20 blinks/min
-   Status: {"✅ Good" if 12 <= avg_blink_rate <= 25 else "⚠️ Needs attention"}
-
-🪑 POSTURE ANALYSIS
-   Good Distance: {int(self.total_good_posture_time // 60)}m
-   Too Close: {int(self.total_too_close_time // 60)}m
-   Posture Score: {posture_score:.1f}%
-
-💡 RECOMMENDATIONS
-"""
-        
-        # Add recommendations
-        if self.total_too_close_time / session_duration > 0.3:
-            report += "   ⚠️  Sitting too close frequently. Adjust your desk setup.\n"
-        
-        if avg_blink_rate < 12:
-            report += "   ⚠️  Low blink rate. Follow the 20-20-20 rule: Every 20 min,\n"
-            report += "       look at something 20 feet away for 20 seconds.\n"
-        
-        if self.total_away_time / session_duration > 0.4:
-            report += "   ⚠️  Frequently distracted. Consider focus techniques like Pomodoro.\n"
-        
-        if focus_rate > 75:
-            report += "   ✅ Excellent focus maintained! Great job!\n"
-        
-        if posture_score > 80:
-            report += "   ✅ Good distance from screen maintained!\n"
-        
-        if 12 <= avg_blink_rate <= 25:
-            report += "   ✅ Healthy blink rate - your eyes are well hydrated!\n"
-        
-        report += "\n" + "="*60 + "\n"
-        
-        # Save to file
-        filename = f"session_report_{timestamp}.txt"
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(report)
+        """Save the session report; rendering and writing happen in the background"""
+        return self.report_writer.submit(self.report_snapshot())
+    
+    def process_frame(self, frame):
+        """Run detection, statistics and overlays on one raw frame"""
+        # Flip frame for mirror effect; grayscale only on frames that run detection
+        detect = self.frame_index % self.detect_every == 0
+        frame, gray = self.preprocessor.prepare(frame, convert=detect)
+        
+        # Detect face and eyes (every detect_every frames, reusing the last result in between)
+        if detect:
+            self.last_detection = self.detect_face_and_eyes(gray)
+        self.frame_index += 1
+        face, eyes, roi_gray = self.last_detection
+        
+        # Analyze position and attention
+        position_info = self.analyze_position(face, frame.shape)
+        eye_info = self.analyze_eyes(eyes, face)
+        self.face_present = position_info.face_detected
+        
+        # Update statistics
+        self.update_statistics(position_info, eye_info)
+        
+        # Draw visualizations
+        frame = self.draw_visualizations(frame, face, eyes, position_info)
+        
+        # Draw alerts and stats
+        frame = self.draw_alerts(frame, position_info, eye_info)
+        frame = self.draw_stats_panel(frame, eye_info)
+        
+        # Show calibration status
+        if not self.calibrated:
+            cv2.putText(frame, "🎯 Calibrating... Sit comfortably and look at camera", 
+                       (20, frame.shape[0] - 20), cv2.FONT_HERSHEY_SIMPLEX, 
+                       0.7, (0, 255, 255), 2)
         
-        print(f"\n📄 Session report saved to: {filename}")
-        print(report)
+        return frame
+    
+    def record_away_time(self):
+        """Idle mode: the time counts as away, as it does for active frames without a face"""
+        current_time = self.clock()
+        time_delta = current_time - self.last_check
+        self.total_away_time += time_delta
+        # The primary user's own session, as in update_statistics
+        if self.person is not None:
+            self.person.primary_time += time_delta
+            self.person.away_time += time_delta
+        self.last_check = current_time
+        self.is_looking_away = True
+    
+    def resume_from_idle(self):
+        """Back from idle mode: detect on the very next frame and start the away timer afresh"""
+        self.frame_index = 0
+        self.looking_away_start = None
+        self.face_present = True
+    
+    def handle_key(self, key):
+        """Handle a key press; returns False when the user wants to quit"""
+        if key == ord('q'):
+            return False
+        elif key == ord('r'):
+            self.reset_statistics()
+            print("📊 Statistics reset!")
+        elif key == ord('s'):
+            self.save_session_report()
+        elif key == ord('c'):
+            self.calibrated = False
+            self.baseline_face_size = None
+            if self.person is not None:
+                self.person.baseline = None
+            print("🔄 Recalibrating...")
+        return True
+    
+    def record_blink(self, current_time):
+        """Add a blink to the rate window and to the session's blinks-per-minute history"""
+        self.blink_times.append(current_time)
+        minute = max(int((current_time - self.session_start) // 60), 0)
+        if minute >= len(self.blinks_per_minute):
+            self.blinks_per_minute.extend([0] * (minute + 1 - len(self.blinks_per_minute)))
+        self.blinks_per_minute[minute] += 1
     
-    def run(self):
-        """Main monitoring loop"""
-        cap = cv2.VideoCapture(0)
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+    def get_statistics(self):
+        """Session statistics as a plain dict (used by replay regression checks)"""
+        return {
+            'session_start': self.session_start,
+            'total_focused_time': self.total_focused_time,
+            'total_away_time': self.total_away_time,
+            'total_too_close_time': self.total_too_close_time,
+            'total_good_posture_time': self.total_good_posture_time,
+            'blink_counter': self.blink_counter,
+            'blinks_per_minute': list(self.blinks_per_minute),
+            'baseline_face_size': int(self.baseline_face_size) if self.baseline_face_size else None,
+            'last_distance_alert': self.last_distance_alert,
+            'last_attention_alert': self.last_attention_alert,
+            'people': [person.as_dict() for person in self.tracker.sessions()],
+        }
+    
+    def run(self, source=None, recorder=None, headless=False, memory_monitor=None, config_watcher=None):
+        """Main monitoring loop
+        
+        headless runs without a window (service mode, stop with Ctrl+C);
+        memory_monitor, if given, enforces its memory budget every frame;
+        config_watcher, if given, hot-reloads settings between frames.
+        """
+        capture = self.config.capture
+        cap = source if source is not None else CameraSource(
+            0, capture.width, capture.height, capture.fps, capture.buffer_size)
         
         print("🚀 Smart Desk Monitor Started!")
+        print(f"📹 Source: {cap.describe()}")
+        print(f"⚙️  {describe_opencv()}")
+        if recorder:
+            print(f"⏺️  Recording session to: {recorder.path}")
         print("📹 Calibrating... Please sit at a comfortable distance and look at camera")
         print("\n💡 Controls:")
         print("   Q - Quit")
@@ -378,82 +577,133 @@ class SimplifiedDeskMonitor:
         fps_counter = 0
         fps = 0
         
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            # Flip frame for mirror effect
-            frame = cv2.flip(frame, 1)
-            
-            # Detect face and eyes
-            face, eyes, roi_gray = self.detect_face_and_eyes(frame)
-            
-            # Analyze position and attention
-            position_info = self.analyze_position(face, frame.shape)
-            eye_info = self.analyze_eyes(eyes, face)
-            
-            # Update statistics
-            self.update_statistics(position_info, eye_info)
-            
-            # Draw visualizations
-            if face is not None:
-                frame = self.draw_visualizations(frame, face, eyes, position_info)
-            
-            # Draw alerts and stats
-            frame = self.draw_alerts(frame, position_info, eye_info)
-            frame = self.draw_stats_panel(frame, eye_info)
-            
-            # Show calibration status
-            if not self.calibrated:
-                cv2.putText(frame, "🎯 Calibrating... Sit comfortably and look at camera", 
-                           (20, frame.shape[0] - 20), cv2.FONT_HERSHEY_SIMPLEX, 
-                           0.7, (0, 255, 255), 2)
-            
-            # Calculate and display FPS
-            fps_counter += 1
-            if time.time() - fps_time > 1:
-                fps = fps_counter
-                fps_counter = 0
-                fps_time = time.time()
-            
-            cv2.putText(frame, f"FPS: {fps}", (10, 30), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-            
-            # Display frame
-            cv2.imshow('Smart Desk Monitor - Posture & Focus Tracker', frame)
-            
-            # Handle key presses
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord('q'):
-                break
-            elif key == ord('r'):
-                self.reset_statistics()
-                print("📊 Statistics reset!")
-            elif key == ord('s'):
-                self.save_session_report()
-            elif key == ord('c'):
-                self.calibrated = False
-                self.baseline_face_size = None
-                print("🔄 Recalibrating...")
+        # Idle mode reconfigures a live camera; files and synthetic frames are read at their
+        # own pace, and recordings would get low-resolution frames a replay can't reproduce
+        presence = None
+        if self.config.presence.enabled and isinstance(cap, CameraSource) and not recorder:
+            presence = self.presence = PresenceController(self.config.presence, self.config.detection,
+                                                          self.clock)
+        
+        if memory_monitor:
+            memory_monitor.start()
+        
+        try:
+            while cap.isOpened():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                
+                # Drive the engine from the capture timestamp so a replay sees the same times
+                if hasattr(self.clock, 'advance'):
+                    self.clock.advance(cap.last_timestamp)
+                if recorder:
+                    frame = recorder.encode(frame)
+                
+                # Nobody at the desk: a cheap presence check replaces full monitoring
+                redraw = True
+                if presence and presence.idle:
+                    if presence.detect(frame):
+                        presence.wake(cap, self.config.capture)
+                        self.resume_from_idle()
+                    else:
+                        self.record_away_time()
+                    frame = presence.idle_frame()
+                    redraw = presence.should_redraw()
+                else:
+                    frame = self.process_frame(frame)
+                    if presence:
+                        presence.observe(self.face_present, cap)
+                
+                if config_watcher:
+                    self.reload_config(config_watcher, cap)
+                
+                if memory_monitor:
+                    try:
+                        memory_monitor.check()
+                    except MemoryBudgetExceeded as e:
+                        print(f"🧠 Stopping: {e}")
+                        break
+                
+                if headless:
+                    if recorder:
+                        recorder.write(cap.last_timestamp)
+                    continue
+                
+                # Calculate and display FPS
+                fps_counter += 1
+                if time.time() - fps_time > 1:
+                    fps = fps_counter
+                    fps_counter = 0
+                    fps_time = time.time()
+                
+                cv2.putText(frame, f"FPS: {fps}", (10, 30), 
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+                
+                # Display frame (only now and then while idle)
+                if redraw:
+                    cv2.imshow('Smart Desk Monitor - Posture & Focus Tracker', frame)
+                
+                # Handle key presses
+                key = cv2.waitKey(1) & 0xFF
+                if recorder:
+                    recorder.write(cap.last_timestamp, key if key in REPLAYED_KEYS else NO_KEY)
+                if not self.handle_key(key):
+                    break
+        
+        except KeyboardInterrupt:
+            print("\n⏹️  Interrupted")
         
         # Cleanup
+        print(f"📹 Capture: {cap.stats.summary()}")
         cap.release()
-        cv2.destroyAllWindows()
+        if not headless:
+            cv2.destroyAllWindows()
+        if recorder:
+            recorder.close()
+            print(f"⏺️  Recorded {recorder.frames} frames to: {recorder.path}")
+        if self.cache is not None:
+            print(f"🗃️  Detection cache: {self.cache.summary()}")
+        if presence:
+            print(f"🔋 Presence: {presence.report()}")
+        if memory_monitor:
+            print(f"🧠 Memory: {memory_monitor.report()}")
+            memory_monitor.stop()
         
         # Final report
         print("\n🏁 Session ended!")
         self.save_session_report()
+        self.report_writer.close()
+    
+    def reload_config(self, config_watcher, cap):
+        """Apply a changed config file between frames"""
+        config = config_watcher.poll()
+        if config is None:
+            return
+        capture_changed = config.capture != self.config.capture
+        self.apply_config(config)
+        if self.presence:
+            self.presence.configure(config.presence, config.detection)
+        if capture_changed and hasattr(cap, 'reconfigure') and not (self.presence and self.presence.idle):
+            cap.reconfigure(config.capture.width, config.capture.height,
+                            config.capture.fps, config.capture.buffer_size)
+            # Face size baseline depends on the capture resolution
+            self.calibrated = False
+            self.baseline_face_size = None
+            self.tracker.reset_calibration()
+            print(f"📹 Capture: {cap.describe()}")
+        print("🔧 Config reloaded")
     
     def reset_statistics(self):
         """Reset all statistics"""
-        self.session_start = time.time()
+        self.session_start = self.clock()
         self.total_away_time = 0
         self.total_focused_time = 0
         self.total_too_close_time = 0
         self.total_good_posture_time = 0
         self.blink_counter = 0
         self.blink_times.clear()
+        self.blinks_per_minute = []
+        self.tracker.reset_statistics()
 
 
 if __name__ == "__main__":
@@ -467,5 +717,51 @@ if __name__ == "__main__":
     For advanced pose estimation, please use Python 3.8-3.12 with MediaPipe.
     """)
     
-    monitor = SimplifiedDeskMonitor()
-    monitor.run()
+    parser = argparse.ArgumentParser(description="Smart Desk Monitor - Simplified Edition")
+    parser.add_argument('--source', default=None,
+                        help="Camera index, video file, image directory or 'synthetic[:WxH]' (overrides capture.source)")
+    parser.add_argument('--record', metavar='PATH',
+                        help="Record the raw session (frames, timestamps, keys) to PATH")
+    parser.add_argument('--replay', metavar='PATH',
+                        help="Replay a recorded session at full speed and print its statistics")
+    parser.add_argument('--expect', metavar='JSON',
+                        help="With --replay: compare statistics against a stored JSON file")
+    parser.add_argument('--service', action='store_true',
+                        help="Long-running mode: no window, memory tracked and kept within budget")
+    parser.add_argument('--memory-budget', type=float, default=512, metavar='MB',
+                        help="With --service: stop if resident memory exceeds this many MB (default 512)")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="With --service: trace Python allocations from the start instead of only after RSS grows")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    
+    try:
+        config_watcher = ConfigWatcher(args.config, args.overrides)
+    except ConfigError as e:
+        parser.error(str(e))
+    config = config_watcher.config
+    
+    if args.replay:
+        stats = replay(args.replay, lambda clock: SimplifiedDeskMonitor(clock=clock, config=config))
+        if args.expect:
+            mismatches = check_statistics(stats, args.expect)
+            for mismatch in mismatches:
+                print(f"❌ {mismatch}")
+            print("✅ Statistics match" if not mismatches else f"❌ {len(mismatches)} mismatches")
+            sys.exit(1 if mismatches else 0)
+        print(json.dumps(stats, indent=2))
+        sys.exit(0)
+    
+    capture = config.capture
+    source = open_source(args.source or capture.source, capture.width, capture.height,
+                         capture.fps, capture.buffer_size)
+    if args.record:
+        clock = FrameClock(source.start_time)
+        monitor = SimplifiedDeskMonitor(clock=clock, config=config)
+        recorder = SessionRecorder(args.record, clock())
+    else:
+        monitor = SimplifiedDeskMonitor(config=config)
+        recorder = None
+    memory_monitor = MemoryMonitor(budget_mb=args.memory_budget, trace=args.trace_memory) if args.service else None
+    monitor.run(source, recorder, headless=args.service, memory_monitor=memory_monitor,
+                config_watcher=config_watcher if args.config else None)
@@ -0,0 +1,95 @@
+"""
+Smart Desk Monitor - Soak Test
+Run a monitor headless on synthetic frames for a long time and fail if
+memory keeps growing after warm-up
+
+    python soak.py --hours 4
+    python soak.py --minutes 5 --max-growth 10 --full
+"""
+
+import argparse
+import sys
+import time
+
+from capture import SyntheticSource
+from memory_guard import MemoryMonitor, MemoryBudgetExceeded
+from session_recording import FrameClock
+
+
+def build_monitor(full, clock):
+    if full:
+        from smart_desk_monitor import SmartDeskMonitor
+        monitor = SmartDeskMonitor(clock=clock)
+    else:
+        from smart_desk_monitor_simple import SimplifiedDeskMonitor
+        monitor = SimplifiedDeskMonitor(clock=clock)
+    monitor.sound_enabled = False
+    return monitor
+
+
+def soak(duration, full=False, width=1280, height=720, budget_mb=None, max_growth_mb=20,
+         warmup=60.0, sample_interval=5.0):
+    """Process synthetic frames for `duration` wall-clock seconds; returns True if memory stayed flat"""
+    source = SyntheticSource(width, height)
+    clock = FrameClock(source.start_time)
+    monitor = build_monitor(full, clock)
+    memory = MemoryMonitor(budget_mb=budget_mb, max_growth_mb=max_growth_mb,
+                           sample_interval=sample_interval, snapshot_interval=max(duration / 10, sample_interval),
+                           warmup=min(warmup, duration / 4), trace=True)
+
+    print(f"🧪 Soak test: {source.describe()} for {duration / 60:.1f} min "
+          f"({'MediaPipe' if full else 'Haar cascade'} monitor)")
+    memory.start()
+    end = time.monotonic() + duration
+    next_progress = time.monotonic() + 60
+    frames = 0
+    ok = True
+
+    try:
+        while time.monotonic() < end:
+            ret, frame = source.read()
+            clock.advance(source.last_timestamp)
+            monitor.process_frame(frame)
+            memory.check()
+            frames += 1
+
+            if time.monotonic() >= next_progress:
+                next_progress += 60
+                print(f"   {frames} frames, {memory.report().splitlines()[0]}")
+    except MemoryBudgetExceeded as e:
+        print(f"❌ {e}")
+        ok = False
+    except KeyboardInterrupt:
+        print("⏹️  Interrupted")
+    finally:
+        # One last heap diff at the very end
+        memory.take_snapshot()
+        if hasattr(monitor, 'close'):
+            monitor.close()
+
+    print(f"\n📊 {frames} frames processed, {source.stats.summary()}")
+    print(f"🧠 {memory.report()}")
+    memory.stop()
+
+    if memory.leak_suspected():
+        print(f"❌ Memory grew {memory.growth / 1048576:.1f} MB after warm-up (limit {max_growth_mb} MB)")
+        ok = False
+    elif ok:
+        print("✅ Memory stayed flat")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Soak-test the Smart Desk Monitor for memory growth")
+    parser.add_argument('--hours', type=float, default=0)
+    parser.add_argument('--minutes', type=float, default=0)
+    parser.add_argument('--full', action='store_true', help="Soak the MediaPipe monitor instead of the simplified one")
+    parser.add_argument('--size', default='1280x720', help="Synthetic frame size, WxH")
+    parser.add_argument('--budget', type=float, default=None, metavar='MB', help="Fail immediately above this RSS")
+    parser.add_argument('--max-growth', type=float, default=20, metavar='MB',
+                        help="Fail if RSS grows more than this after warm-up (default 20)")
+    args = parser.parse_args()
+
+    duration = args.hours * 3600 + args.minutes * 60 or 3600
+    width, height = (int(v) for v in args.size.lower().split('x'))
+    sys.exit(0 if soak(duration, args.full, width, height, args.budget, args.max_growth) else 1)
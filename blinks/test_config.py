@@ -0,0 +1,28 @@
+"""
+Smart Desk Monitor - Configuration Tests
+The shipped desk_monitor.toml documents the defaults, so skipping it must
+not change anything
+"""
+
+import pytest
+
+import config
+from config import DEFAULT_CONFIG_FILE, ConfigError, MonitorConfig, load_config
+
+
+@pytest.mark.skipif(config.tomllib is None, reason="needs Python 3.11+ or tomli")
+def test_shipped_config_matches_defaults():
+    assert load_config(DEFAULT_CONFIG_FILE) == MonitorConfig()
+
+
+def test_default_config_without_toml_parser(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, 'tomllib', None)
+    loaded = load_config(DEFAULT_CONFIG_FILE, ['alerts.alert_cooldown=9'])
+    assert loaded.alerts.alert_cooldown == 9
+    assert loaded.detection == MonitorConfig().detection
+
+    # A file the user asked for explicitly still has to be read
+    explicit = tmp_path / 'mine.toml'
+    explicit.write_text('[alerts]\nalert_cooldown = 9\n', encoding='utf-8')
+    with pytest.raises(ConfigError):
+        load_config(str(explicit))
@@ -0,0 +1,105 @@
+"""
+Smart Desk Monitor - Face Tracker Tests
+Whose face is the primary user decides whose statistics drive the alerts
+"""
+
+from face_tracker import FaceTracker
+
+
+USER = (100, 80, 120, 120)
+BYSTANDER = (400, 60, 60, 60)       # Someone behind the user, smaller
+LEANING_IN = (90, 70, 160, 160)     # The user, closer to the camera
+SAME_SIZE = (400, 60, 110, 110)     # Someone else about the user's size
+
+
+def run(tracker, frames, start=0.0, step=0.1):
+    """Feed a list of per-frame rectangle lists; returns the primary track after each frame"""
+    return [tracker.update(rects, start + i * step) for i, rects in enumerate(frames)]
+
+
+def test_primary_keeps_its_track_when_a_larger_face_appears():
+    tracker = FaceTracker(max_faces=1)
+    user = run(tracker, [[USER]] * 3)[-1]
+    primary = run(tracker, [[(420, 40, 150, 150), USER]] * 5, start=1.0)
+
+    assert all(track is user and track.visible for track in primary)
+    assert tracker.tracks == [user]
+
+
+def test_bystanders_get_their_own_session():
+    tracker = FaceTracker()
+    user = run(tracker, [[USER]] * 3)[-1]
+    user.session.baseline = 14400
+    primary = run(tracker, [[USER, BYSTANDER]] * 5, start=1.0)
+
+    assert all(track is user for track in primary)
+    assert [s.person_id for s in tracker.sessions()] == [1, 2]
+    assert tracker.sessions()[1].baseline is None
+
+
+def test_much_larger_face_takes_over():
+    tracker = FaceTracker(switch_ratio=1.5)
+    user = run(tracker, [[USER]] * 3)[-1]
+    # Leaning in is still the same track, however large the face gets
+    assert run(tracker, [[LEANING_IN, BYSTANDER]] * 3, start=1.0)[-1] is user
+
+    # Someone sits down right in front of the camera
+    newcomer = run(tracker, [[USER, (300, 50, 200, 200)]] * 3, start=2.0)[-1]
+    assert newcomer is not user and newcomer.session.person_id == 3
+
+
+def test_short_absence_keeps_the_track():
+    tracker = FaceTracker(max_age=10.0)
+    user = run(tracker, [[USER]] * 3)[-1]
+    assert run(tracker, [[]] * 50, start=1.0)[-1] is user and not user.visible
+    assert run(tracker, [[USER]], start=6.0)[-1] is user and user.visible
+
+
+def test_absent_user_is_not_replaced_by_someone_already_there():
+    tracker = FaceTracker(max_age=10.0)
+    user = run(tracker, [[USER, SAME_SIZE]] * 3)[-1]
+    session = user.session
+    assert run(tracker, [[SAME_SIZE]] * 3, start=1.0)[-1] is user
+
+    # The user's track expires; someone who was there all along doesn't take over,
+    # even though they're about the user's size
+    assert run(tracker, [[SAME_SIZE]], start=12.0)[-1] is None
+    assert tracker.absent is user
+    assert session in tracker.sessions()
+
+
+def test_returning_user_gets_their_session_back():
+    tracker = FaceTracker(max_age=10.0)
+    user = run(tracker, [[USER]] * 3)[-1]
+    session = user.session
+    session.baseline = 14400
+    run(tracker, [[]], start=1.0)
+    assert run(tracker, [[]], start=12.0)[-1] is None
+
+    # Back in their seat, slightly shifted: same person, calibration kept
+    returning = run(tracker, [[(105, 85, 118, 118)]] * 2, start=30.0)[-1]
+    assert returning is not user and returning.session is session
+    assert session.baseline == 14400 and tracker.absent is None
+    assert [s.person_id for s in tracker.sessions()] == [1]
+
+
+def test_returning_user_recognised_by_size_elsewhere():
+    tracker = FaceTracker(max_age=10.0, switch_ratio=1.5)
+    session = run(tracker, [[USER]] * 3)[-1].session
+    run(tracker, [[]], start=12.0)
+
+    # A small face elsewhere isn't the user; one about their size is
+    assert run(tracker, [[BYSTANDER]], start=20.0)[-1] is None
+    returning = run(tracker, [[BYSTANDER, SAME_SIZE]], start=21.0)[-1]
+    assert returning.session is session
+
+
+def test_expired_bystanders_are_finished():
+    tracker = FaceTracker(max_age=10.0)
+    user = run(tracker, [[USER, BYSTANDER]] * 3)[-1]
+    run(tracker, [[USER]] * 2, start=1.0)
+    run(tracker, [[USER]], start=12.0)
+
+    assert tracker.tracks == [user]
+    assert [s.person_id for s in tracker.finished] == [2]
+    assert [s.person_id for s in tracker.sessions()] == [1, 2]
@@ -0,0 +1,58 @@
+"""
+Smart Desk Monitor - Head Pose Tests
+The recovered angles and their signs are what head_pose.screen_yaw and
+screen_pitch are configured against
+"""
+
+import math
+
+import cv2
+import numpy as np
+import pytest
+
+from head_pose import HeadPoseEstimator, MODEL_POINTS
+
+
+FRAME = (480, 640, 3)
+CAMERA = np.array([[640, 0, 320], [0, 640, 240], [0, 0, 1]], dtype=np.float64)
+
+
+def project(yaw, pitch, tvec=(20.0, -10.0, 600.0)):
+    """Pixels of MODEL_POINTS for a head at the given yaw and pitch (degrees, no roll)"""
+    y, p = math.radians(yaw), math.radians(pitch)
+    ry = np.array([[math.cos(y), 0, math.sin(y)], [0, 1, 0], [-math.sin(y), 0, math.cos(y)]])
+    rx = np.array([[1, 0, 0], [0, math.cos(p), -math.sin(p)], [0, math.sin(p), math.cos(p)]])
+    rvec, _ = cv2.Rodrigues(ry @ rx)
+    points, _ = cv2.projectPoints(MODEL_POINTS, rvec, np.array(tvec), CAMERA, None)
+    return points.reshape(-1, 2)
+
+
+@pytest.mark.parametrize('yaw', [-30.0, -10.0, 0.0, 15.0, 30.0])
+@pytest.mark.parametrize('pitch', [-20.0, 0.0, 20.0])
+def test_recovers_known_angles(yaw, pitch):
+    pose = HeadPoseEstimator().estimate(project(yaw, pitch), FRAME)
+    assert pose.yaw == pytest.approx(yaw, abs=0.1)
+    assert pose.pitch == pytest.approx(pitch, abs=0.1)
+    assert pose.roll == pytest.approx(0.0, abs=0.1)
+
+
+def test_angle_signs_match_the_image():
+    # yaw > 0: turned towards the image's left, so the nose tip moves left of the eyes
+    points = project(20.0, 0.0)
+    assert points[0, 0] < (points[2, 0] + points[3, 0]) / 2
+
+    # pitch > 0: looking down, so the nose tip drops further below the eyes
+    def nose_drop(pitch):
+        points = project(0.0, pitch)
+        return points[0, 1] - (points[2, 1] + points[3, 1]) / 2
+    assert nose_drop(15.0) > nose_drop(0.0)
+
+
+def test_cold_solves_survive_landmark_noise():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        yaw, pitch = rng.uniform(-35, 35), rng.uniform(-25, 25)
+        tvec = (rng.uniform(-80, 80), rng.uniform(-60, 60), rng.uniform(450, 900))
+        points = project(yaw, pitch, tvec) + rng.normal(0, 3, (6, 2))
+        pose = HeadPoseEstimator().estimate(points, FRAME)
+        assert pose is not None and pose.tvec[2, 0] > 0
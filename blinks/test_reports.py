@@ -0,0 +1,52 @@
+"""
+Smart Desk Monitor - Report Tests
+Reports must cover the whole session, however long it ran
+"""
+
+import re
+
+from reports import _svg_blinks, render_bulk, write_reports
+from session_recording import FrameClock
+from smart_desk_monitor_simple import SimplifiedDeskMonitor
+
+
+def test_blink_history_covers_long_sessions():
+    clock = FrameClock(1000.0)
+    monitor = SimplifiedDeskMonitor(clock=clock)
+    # 20 minutes at 24 blinks/min: far more blinks than the live rate window keeps
+    for i in range(20 * 24):
+        t = 1000.0 + i * 2.5
+        clock.advance(t)
+        monitor.record_blink(t)
+
+    stats = monitor.get_statistics()
+    assert stats['blinks_per_minute'] == [24] * 20
+
+    stats.update(session_duration=20 * 60.0)
+    chart = _svg_blinks(stats)
+    assert re.findall(r'minute \d+: (\d+) blinks', chart) == ['24'] * 20 + ['0']
+
+
+def test_blink_history_restarts_on_reset():
+    clock = FrameClock(0.0)
+    monitor = SimplifiedDeskMonitor(clock=clock)
+    monitor.record_blink(30.0)
+    clock.advance(90.0)
+    monitor.reset_statistics()
+    monitor.record_blink(95.0)
+    assert monitor.get_statistics()['blinks_per_minute'] == [1]
+
+
+def test_bulk_rendering_reports_bad_sessions(tmp_path):
+    monitor = SimplifiedDeskMonitor(clock=FrameClock(0.0))
+    write_reports(monitor.report_snapshot(), str(tmp_path), ('json',), 'good')
+    (tmp_path / 'corrupt.json').write_text('{"statistics": ', encoding='utf-8')
+    (tmp_path / 'not_a_report.json').write_text('{"statistics": {}}', encoding='utf-8')
+    (tmp_path / 'corrupt.npz').write_bytes(b'not a zip file')
+    paths = [str(tmp_path / name) for name in
+             ('good.json', 'corrupt.json', 'missing.json', 'not_a_report.json', 'corrupt.npz')]
+
+    rows = render_bulk(paths, str(tmp_path / 'out'), ('html',), workers=1)
+    assert [row['source'] for row in rows] == paths
+    assert [('error' in row) for row in rows] == [False, True, True, True, True]
+    assert (tmp_path / 'out' / 'good.html').exists()
@@ -0,0 +1,191 @@
+"""
+Smart Desk Monitor - Session Analytics Tests
+The vectorized statistics and alert timelines must agree with what the
+live simplified monitor computes frame by frame
+"""
+
+import numpy as np
+import pytest
+
+from batch_analysis import BatchAnalyzer
+from capture import SyntheticSource
+from config import build_config
+from session_analytics import (SessionSignals, Cooldown, apply_refractory, simple_statistics,
+                               alert_timeline, sweep)
+from session_recording import FrameClock, SessionRecorder, RecordingSource
+from smart_desk_monitor_simple import SimplifiedDeskMonitor
+
+
+FPS = 30.0
+
+
+def cooldown_loop(times, refractory, last_time):
+    """The live monitor's cooldown rule, one event at a time"""
+    kept = []
+    for t in times:
+        if t - last_time > refractory:
+            kept.append(t)
+            last_time = t
+    return np.array(kept)
+
+
+def scripted_session():
+    """Per-frame (face rect or None, eye count) covering blinks, looking away, too close and absence"""
+    script = []
+    for i in range(int(45 * FPS)):
+        t = i / FPS
+        face, eyes = (40, 20, 80, 80), 2
+        if t < 10:
+            if i % 60 < 3 or 210 <= i < 222:     # Blinks every 2 s, one closure too long to count
+                eyes = 0
+        elif t < 18:
+            eyes = 0                             # Looking away
+        elif t < 24:
+            face = (30, 10, 100, 100)            # Leaning in
+            eyes = 1 if t < 20 else 2
+        elif t < 31:
+            face = None                          # Left the desk
+        elif i % 45 in (0, 1) or i % 45 in (5, 6):
+            eyes = 0                             # Blinks 0.17 s apart: the second is too soon
+        script.append((face, eyes))
+    return script
+
+
+class ScriptedCascade:
+    """Stands in for a Haar cascade, answering from the script for the monitor's current frame"""
+    def __init__(self, monitor, script, eyes):
+        self.monitor = monitor
+        self.script = script
+        self.eyes = eyes
+
+    def detectMultiScale(self, image, *args):
+        face, eyes = self.script[self.monitor.frame_index]
+        if self.eyes:
+            return [(0, 0, 10, 10)] * eyes
+        return [face] if face is not None else ()
+
+
+def run_live(frames, monitor, recorder=None):
+    """Feed frames through a live monitor; returns (statistics, attention alert times, distance alert times)"""
+    attention, distance = [], []
+    for timestamp, frame in frames:
+        monitor.clock.advance(timestamp)
+        last_attention, last_distance = monitor.last_attention_alert, monitor.last_distance_alert
+        if recorder is not None:
+            frame = recorder.encode(frame)
+        monitor.process_frame(frame)
+        if recorder is not None:
+            recorder.write(timestamp)
+        if monitor.last_attention_alert != last_attention:
+            attention.append(monitor.last_attention_alert)
+        if monitor.last_distance_alert != last_distance:
+            distance.append(monitor.last_distance_alert)
+    return monitor.get_statistics(), attention, distance
+
+
+def synthetic_frames(source):
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            return
+        yield source.last_timestamp, frame
+
+
+def assert_matches_live(signals, live, attention, distance, config=None):
+    stats = simple_statistics(signals, config)
+    for key in ('total_focused_time', 'total_away_time', 'total_too_close_time', 'total_good_posture_time'):
+        assert stats[key] == pytest.approx(live[key], abs=1e-9), key
+    assert stats['blink_counter'] == live['blink_counter']
+    assert stats['blinks_per_minute'] == live['blinks_per_minute']
+    assert stats['baseline_face_size'] == live['baseline_face_size']
+
+    alerts = alert_timeline(signals, config)
+    assert alerts['attention'].tolist() == attention
+    assert alerts['distance'].tolist() == distance
+
+
+def test_apply_refractory_matches_loop():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        gaps = rng.choice([1 / FPS, 0.0, 0.1, 0.2, 1 / 3, 5.0], rng.integers(0, 300))
+        times = np.cumsum(gaps)
+        refractory = float(rng.choice([0.0, 0.1, 0.2, 1 / 3, 5.0]))
+        np.testing.assert_array_equal(apply_refractory(times, refractory, 0.0),
+                                      cooldown_loop(times, refractory, 0.0))
+
+        mask = rng.random(len(times)) < 0.5
+        np.testing.assert_array_equal(Cooldown(times, refractory).apply(mask),
+                                      cooldown_loop(times[mask], refractory, 0.0))
+
+
+def test_statistics_match_live_monitor():
+    script = scripted_session()
+    source = SyntheticSource(160, 120, FPS, num_frames=len(script))
+    monitor = SimplifiedDeskMonitor(clock=FrameClock(source.start_time))
+    monitor.sound_enabled = False
+    monitor.face_cascade = ScriptedCascade(monitor, script, eyes=False)
+    monitor.eye_cascade = ScriptedCascade(monitor, script, eyes=True)
+    live, attention, distance = run_live(synthetic_frames(source), monitor)
+
+    # Every behaviour the script sets up actually happened
+    assert live['blink_counter'] > 5 and live['total_too_close_time'] > 0
+    assert attention and distance
+
+    signals = SessionSignals(
+        timestamps=np.arange(len(script)) / FPS,
+        face_detected=[face is not None for face, _ in script],
+        face_size=[face[2] * face[3] if face else 0 for face, _ in script],
+        face_center_x=[(face[0] + face[2] // 2) / 160 if face else np.nan for face, _ in script],
+        eyes=[eyes if face else 0 for face, eyes in script],
+        session_start=source.start_time,
+    )
+    assert_matches_live(signals, live, attention, distance)
+
+
+@pytest.mark.parametrize('scale', [1.0, 0.5])
+def test_batch_analysis_matches_live_recording(tmp_path, scale):
+    path = str(tmp_path / 'session.rec')
+    # Downscaled, the synthetic face needs the larger frame to still be found
+    width, height = (320, 240) if scale == 1.0 else (640, 480)
+    source = SyntheticSource(width, height, FPS, num_frames=400)
+    config = build_config({'performance': {'detection_scale': scale}})
+    monitor = SimplifiedDeskMonitor(clock=FrameClock(source.start_time), config=config)
+    monitor.sound_enabled = False
+    recorder = SessionRecorder(path, monitor.clock())
+    live, attention, distance = run_live(synthetic_frames(source), monitor, recorder)
+    recorder.close()
+    assert live['baseline_face_size'] and attention
+
+    analyzer = BatchAnalyzer(config, workers=1)
+    try:
+        signals = analyzer.analyze(RecordingSource(path))
+    finally:
+        analyzer.close()
+    assert_matches_live(signals, live, attention, distance, config)
+
+
+def test_sweep_matches_per_combination_statistics():
+    rng = np.random.default_rng(1)
+    n = 20000
+    face = (np.arange(n) // 900) % 6 != 4
+    eyes = np.where(rng.random(n) < 0.03, 0, 2)
+    eyes[(np.arange(n) // 600) % 5 == 2] = 0
+    size = (6000 * (1 + 0.5 * np.sin(np.arange(n) / 2000))).astype(int) * face
+    signals = SessionSignals(np.arange(n) / FPS, face, size, np.where(face, 0.5, np.nan), eyes * face)
+
+    grid = {'alerts.away_time_threshold': [3.0, 5.0], 'simple.distance_threshold_near': [1.2, 1.4],
+            'alerts.alert_cooldown': [2.0, 5.0]}
+    for overrides, totals in sweep([signals, signals], grid):
+        sections = {}
+        for name, value in overrides.items():
+            section, key = name.split('.')
+            sections.setdefault(section, {})[key] = value
+        config = build_config(sections)
+        stats = simple_statistics(signals, config)
+        alerts = alert_timeline(signals, config)
+
+        for key in ('total_focused_time', 'total_away_time', 'total_too_close_time', 'total_good_posture_time'):
+            assert totals[key] == pytest.approx(2 * stats[key]), key
+        assert totals['blink_counter'] == 2 * stats['blink_counter']
+        assert totals['attention_alerts'] == 2 * len(alerts['attention'])
+        assert totals['distance_alerts'] == 2 * len(alerts['distance'])
@@ -0,0 +1,91 @@
+"""
+Smart Desk Monitor - Session Recording Tests
+Replaying a recording must reproduce the live session's statistics exactly
+"""
+
+import json
+
+import pytest
+
+from capture import SyntheticSource
+from session_recording import FrameClock, SessionRecorder, replay, check_statistics, NO_KEY
+from smart_desk_monitor_simple import SimplifiedDeskMonitor
+
+
+def record_session(path, frames=150, keys=None):
+    """Run the simplified monitor live on synthetic frames while recording; returns its statistics"""
+    keys = keys or {}
+    source = SyntheticSource(320, 240, 30, num_frames=frames)
+    clock = FrameClock(source.start_time)
+    monitor = SimplifiedDeskMonitor(clock=clock)
+    monitor.sound_enabled = False
+    recorder = SessionRecorder(str(path), clock())
+
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            break
+        clock.advance(source.last_timestamp)
+        monitor.process_frame(recorder.encode(frame))
+        key = keys.get(source.frame_index, NO_KEY)
+        recorder.write(source.last_timestamp, key)
+        if key != NO_KEY:
+            monitor.handle_key(key)
+    recorder.close()
+    return monitor.get_statistics()
+
+
+def test_replay_matches_live_session(tmp_path):
+    path = tmp_path / 'session.rec'
+    live = record_session(path, keys={50: ord('c'), 100: ord('r')})
+
+    # The synthetic face has to be seen, or the comparison proves nothing
+    assert live['people']
+    assert replay(str(path), lambda clock: SimplifiedDeskMonitor(clock=clock)) == live
+
+
+def test_replay_is_repeatable(tmp_path):
+    path = tmp_path / 'session.rec'
+    record_session(path, frames=30)
+
+    first = replay(str(path), lambda clock: SimplifiedDeskMonitor(clock=clock))
+    second = replay(str(path), lambda clock: SimplifiedDeskMonitor(clock=clock))
+    assert first == second
+
+
+def test_check_statistics_reports_mismatches(tmp_path):
+    path = tmp_path / 'session.rec'
+    live = record_session(path, frames=30)
+    expected = tmp_path / 'expected.json'
+    expected.write_text(json.dumps(live), encoding='utf-8')
+
+    stats = replay(str(path), lambda clock: SimplifiedDeskMonitor(clock=clock))
+    assert check_statistics(stats, str(expected)) == []
+
+    stats['blink_counter'] += 1
+    assert check_statistics(stats, str(expected)) == [
+        f"blink_counter: expected {live['blink_counter']!r}, got {stats['blink_counter']!r}"
+    ]
+
+
+def test_away_time_credits_the_primary_user():
+    source = SyntheticSource(320, 240, 30, num_frames=30)
+    clock = FrameClock(source.start_time)
+    monitor = SimplifiedDeskMonitor(clock=clock)
+    monitor.sound_enabled = False
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            break
+        clock.advance(source.last_timestamp)
+        monitor.process_frame(frame)
+    person = monitor.person
+    assert person is not None
+
+    # Idle mode: ten seconds with nobody there count as the user's away time too
+    away, person_away, primary = monitor.total_away_time, person.away_time, person.primary_time
+    clock.advance(source.last_timestamp + 10.0)
+    monitor.record_away_time()
+    assert monitor.total_away_time - away == pytest.approx(10.0)
+    assert person.away_time - person_away == pytest.approx(10.0)
+    assert person.primary_time - primary == pytest.approx(10.0)